@@ -1,17 +1,65 @@
 # -*- coding: utf-8 -*-
-import os
+import asyncio
+import contextlib
+import dataclasses
+import datetime
+import enum
+import functools
+import hashlib
+import inspect
 import json
+import os
 import logging
+import math
 import re
+import threading
+import time
+from collections import OrderedDict
 from typing import Dict, Any, Optional, List
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
+from pydantic_core import from_json
 import google.generativeai as genai
-from tenacity import retry, stop_after_attempt, wait_exponential
+import requests
+from google.api_core import exceptions as gexc
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential
+
+# 可选依赖：安装 orjson 时用 C 实现序列化上下文，未安装时回退到标准库 json
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
 
 logger = logging.getLogger(__name__)
 
+# 仅对瞬时性错误（限流、服务不可用、超时、网络中断）重试；
+# JSON 解析 / 字段校验失败属于确定性错误，重试只会白白多花 API 调用
+TRANSIENT_ERRORS = (
+    gexc.ResourceExhausted,
+    gexc.ServiceUnavailable,
+    gexc.DeadlineExceeded,
+    gexc.InternalServerError,
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+    ConnectionError,
+    TimeoutError,
+)
+
+_retry_transient = retry(
+    stop=stop_after_attempt(3),
+    wait=wait_exponential(multiplier=1, min=2, max=10),
+    retry=retry_if_exception_type(TRANSIENT_ERRORS),
+    reraise=True,
+)
+
+# Markdown JSON 代码块标记（模块加载时编译一次）
+_FENCE_RE = re.compile(r'```json\n?|\n?```')
+
 # --- 核心数据模型 ---
 class AnalysisResult(BaseModel):
+    # 结果生成后只读，可安全地在缓存与多线程间共享
+    model_config = ConfigDict(frozen=True, extra='ignore')
+
     code: str
     name: str
     operation_advice: str
@@ -22,22 +70,317 @@ class AnalysisResult(BaseModel):
     technical_indicators: Dict[str, str]
     summary: str
 
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "AnalysisResult":
+        """
+        从模型输出的字典构建结果
+
+        JSON 由 response_mime_type="application/json" 约束生成，字段齐全时
+        直接 model_construct 跳过逐字段校验；缺字段或评分类型不符时走完整校验。
+        """
+        if isinstance(data, dict) and REQUIRED_KEYS.issubset(data) and isinstance(data['sentiment_score'], int):
+            return cls.model_construct(**data)
+        return cls(**data)
+
+    @classmethod
+    def fast_parse(cls, raw: str) -> "AnalysisResult":
+        """单次解析模型返回的 JSON 文本（pydantic_core/jiter）并构建结果"""
+        return cls.from_dict(_load_json(raw))
+
     def get_emoji(self) -> str:
         if "买入" in self.operation_advice: return "🚀"
         if "卖出" in self.operation_advice: return "⚠️"
         return "⚖️"
 
+def _load_json(text: str) -> Any:
+    """解析 JSON 文本；response_mime_type 下通常无代码块，偶发被 Markdown 包裹时去除后重试"""
+    try:
+        return from_json(text)
+    except ValueError:
+        return from_json(_FENCE_RE.sub('', text).strip())
+
+# AnalysisResult 必需字段（用于判断能否跳过校验）
+REQUIRED_KEYS = frozenset(AnalysisResult.model_fields)
+
 STOCK_NAME_MAP = {}
 
+
+@functools.cache
+def _configure_genai(api_key: str) -> None:
+    """全局 genai 配置，同一 Key 只执行一次"""
+    genai.configure(api_key=api_key)
+
+
+def _ttl_cache(maxsize: int = 1024, ttl: float = 900):
+    """
+    analyze 结果的进程内 LRU + TTL 缓存
+
+    以 (context, news_context, extra_context, is_crypto, model_name) 的稳定哈希为键，
+    重试、多渠道推送等场景下短时间内重复分析同一标的直接命中缓存；
+    仅缓存成功结果，失败（None）不缓存。同时支持同步与 async 方法，
+    通过 analyze.cache_clear() 清空。
+    """
+    def decorator(func):
+        cache: "OrderedDict[str, tuple]" = OrderedDict()
+        lock = threading.Lock()
+
+        def lookup(key: str):
+            with lock:
+                entry = cache.get(key)
+                if entry is not None and entry[1] > time.time():
+                    cache.move_to_end(key)
+                    return entry[0]
+            return None
+
+        def store(key: str, result) -> None:
+            if result is None:
+                return
+            with lock:
+                cache[key] = (result, time.time() + ttl)
+                cache.move_to_end(key)
+                while len(cache) > maxsize:
+                    cache.popitem(last=False)
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def wrapper(self, context, news_context=None, extra_context="", is_crypto=False, **kwargs):
+                key = self.cache_key(context, news_context, extra_context, is_crypto)
+                cached = lookup(key)
+                if cached is not None:
+                    return cached
+                result = await func(self, context, news_context, extra_context, is_crypto, **kwargs)
+                store(key, result)
+                return result
+        else:
+            @functools.wraps(func)
+            def wrapper(self, context, news_context=None, extra_context="", is_crypto=False, **kwargs):
+                key = self.cache_key(context, news_context, extra_context, is_crypto)
+                cached = lookup(key)
+                if cached is not None:
+                    return cached
+                result = func(self, context, news_context, extra_context, is_crypto, **kwargs)
+                store(key, result)
+                return result
+
+        def cache_clear() -> None:
+            with lock:
+                cache.clear()
+
+        wrapper.cache_clear = cache_clear
+        return wrapper
+    return decorator
+
+
+# --- Prompt 构建 ---
+# 新闻情报最大长度（字符），超出部分截断
+NEWS_MAX_LEN = 3000
+
+# 日线字段及其在 Prompt 中的名称
+_BAR_FIELDS = (
+    ('open', '开盘'), ('high', '最高'), ('low', '最低'), ('close', '收盘'),
+    ('pct_chg', '涨跌幅%'), ('volume', '成交量'), ('amount', '成交额'),
+    ('ma5', 'MA5'), ('ma10', 'MA10'), ('ma20', 'MA20'), ('volume_ratio', '量比'),
+)
+
+# 上下文中的汇总字段
+_SUMMARY_FIELDS = (
+    ('ma_status', '均线形态'),
+    ('volume_change_ratio', '量能变化(今/昨)'),
+    ('price_change_ratio', '价格变化%'),
+)
+
+# 趋势分析（StockTrendAnalyzer）字段
+_TREND_FIELDS = (
+    ('trend_status', '趋势'), ('buy_signal', '信号'), ('signal_score', '评分'),
+    ('bias_ma5', 'MA5乖离%'), ('bias_ma10', 'MA10乖离%'), ('volume_status', '量能'),
+    ('volume_ratio_5d', '量比(5日)'),
+)
+
+# 实时行情快照（RealtimeQuote）字段
+_REALTIME_FIELDS = (
+    ('price', '最新价'), ('change_pct', '涨跌幅%'), ('volume_ratio', '量比'), ('turnover_rate', '换手率%'),
+    ('amplitude', '振幅%'), ('pe_ratio', '市盈率'), ('pb_ratio', '市净率'), ('total_mv', '总市值'),
+    ('circ_mv', '流通市值'), ('change_60d', '60日涨跌幅%'),
+)
+
+_PROMPT_KNOWN_KEYS = frozenset(
+    {'code', 'stock_name', 'date', 'today', 'yesterday', 'trend_analysis', 'realtime'}
+    | {key for key, _ in _SUMMARY_FIELDS}
+)
+
+
+def _json_safe(obj: Any) -> Any:
+    """递归转换为两种实现输出一致的值：枚举取 value，NaN/inf 转为 None，日期时间转为 isoformat 字符串"""
+    if isinstance(obj, enum.Enum):
+        return _json_safe(obj.value)
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {key: _json_safe(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_json_safe(value) for value in obj]
+    if isinstance(obj, (datetime.date, datetime.time)):
+        return obj.isoformat()
+    return obj
+
+
+def _json_default(obj: Any) -> Any:
+    """上下文中的 dataclass（如实时行情快照）按字段序列化，numpy 数组/标量转为原生值，其余对象退化为 str"""
+    if isinstance(obj, (datetime.date, datetime.time)):
+        return obj.isoformat()
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return _json_safe(dataclasses.asdict(obj))
+    if hasattr(obj, 'tolist'):
+        return _json_safe(obj.tolist())
+    return str(obj)
+
+
+def json_dumps(obj: Any, sort_keys: bool = False) -> str:
+    """
+    紧凑 JSON 序列化（中文不转义）
+
+    orjson 与标准库两种实现对上下文中出现的值输出一致：NaN 输出为 null，日期时间统一为 isoformat，
+    枚举输出其 value；orjson 无法处理的值（如超出 64 位的整数）改用标准库序列化。
+    Prompt 中因此不会出现非法 JSON 的 NaN。
+
+    例外：科学计数法的指数写法不同（orjson 输出 1e16，标准库输出 1e+16），只出现在极大/极小的浮点数上，
+    影响仅限于切换 orjson 安装状态后同一输入的缓存键变化，即一次缓存未命中。
+    """
+    if HAS_ORJSON:
+        # dataclass、日期时间与 numpy 对象统一交给 _json_default 转换，与标准库实现保持一致
+        option = orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        try:
+            return orjson.dumps(obj, default=_json_default, option=option).decode()
+        except TypeError:
+            pass
+    return json.dumps(_json_safe(obj), ensure_ascii=False, separators=(',', ':'), sort_keys=sort_keys,
+                      default=_json_default)
+
+
+def _format_bar(bar: Any, fields=_BAR_FIELDS) -> str:
+    """将单日行情、趋势分析字典或行情快照对象格式化为紧凑文本，跳过空值"""
+    get = bar.get if isinstance(bar, dict) else functools.partial(getattr, bar)
+    parts = []
+    for key, label in fields:
+        value = get(key, None)
+        if value is None:
+            continue
+        if isinstance(value, float):
+            value = round(value, 4)
+        parts.append(f"{label} {value}")
+    return " | ".join(parts)
+
+
+# --- 静态系统提示词（绑定到模型的 system_instruction，不随请求变化）---
+STOCK_SYSTEM_PROMPT = "你是一个A股分析专家。请输出JSON分析。"
+CRYPTO_SYSTEM_PROMPT = "你是一个加密货币专家。请输出JSON分析。"
+
 class GeminiAnalyzer:
     def __init__(self, api_key: Optional[str] = None, model_name: str = "gemini-2.0-flash"):
         self.api_key = api_key or os.getenv("GEMINI_API_KEY")
-        if self.api_key:
-            genai.configure(api_key=self.api_key)
         self.model_name = model_name
+        self.generation_config = {"response_mime_type": "application/json", "temperature": 0.2}
+        self._model = None
+        self._crypto_model = None
+        if self.api_key:
+            _configure_genai(self.api_key)
+            # 模型对象只构建一次，后续请求复用，避免每次调用重复构造与校验配置
+            self._model = self._build_model(STOCK_SYSTEM_PROMPT)
+            self._crypto_model = self._build_model(CRYPTO_SYSTEM_PROMPT)
+
+    def cache_key(self, context: Dict[str, Any], news_context: Optional[str] = None,
+                  extra_context: str = "", is_crypto: bool = False) -> str:
+        """分析输入的稳定哈希（进程内缓存与持久化缓存共用）"""
+        return hashlib.blake2b(
+            json_dumps({'c': context, 'n': news_context, 'e': extra_context, 'k': is_crypto,
+                        'm': self.model_name}, sort_keys=True).encode(),
+            digest_size=16,
+        ).hexdigest()
+
+    def _build_model(self, system_prompt: str) -> "genai.GenerativeModel":
+        """构建绑定静态系统提示词的模型，请求内容只需携带动态数据"""
+        return genai.GenerativeModel(
+            model_name=self.model_name,
+            generation_config=self.generation_config,
+            system_instruction=system_prompt
+        )
+
+    @staticmethod
+    def _build_user_prompt(context: Dict[str, Any], news_context: Optional[str] = None,
+                           extra_context: str = "") -> str:
+        """
+        构建每次请求的动态内容（行情数据、情报、情绪参考）
+
+        只输出模型用得到的字段，避免把整个字典的 repr 塞进 Prompt 浪费 token
+        """
+        code = context.get('code', '')
+        name = context.get('stock_name')
+        lines = [f"标的：{name}（{code}）" if name and name != code else f"标的：{code}"]
+        if context.get('date'):
+            lines.append(f"日期：{context['date']}")
+        for key, label in (('today', '今日行情'), ('yesterday', '昨日行情')):
+            if context.get(key):
+                lines.append(f"{label}：{_format_bar(context[key])}")
+        for key, label in _SUMMARY_FIELDS:
+            if context.get(key) is not None:
+                lines.append(f"{label}：{context[key]}")
+        if context.get('realtime') is not None:
+            lines.append(f"实时行情：{_format_bar(context['realtime'], _REALTIME_FIELDS)}")
+        if context.get('trend_analysis'):
+            lines.append(f"趋势分析：{_format_bar(context['trend_analysis'], _TREND_FIELDS)}")
+
+        # 其余未结构化的字段以紧凑 JSON 附带
+        others = {
+            k: v for k, v in context.items()
+            if k not in _PROMPT_KNOWN_KEYS and v not in (None, '', [], {})
+        }
+        if others:
+            lines.append(f"其他数据：{json_dumps(others)}")
+        if news_context:
+            if len(news_context) > NEWS_MAX_LEN:
+                news_context = news_context[:NEWS_MAX_LEN] + "..."
+            lines.append(f"情报：{news_context}")
+
+        prompt = "数据：\n" + "\n".join(lines)
+        if extra_context:
+            prompt += f"\n\n参考情绪：{extra_context}"
+        return prompt
+
+    def _prepare_request(self, context: Dict[str, Any], news_context: Optional[str],
+                         extra_context: str, is_crypto: bool) -> tuple:
+        """按资产类型选择模型（系统提示词已绑定在模型上）并构建请求内容"""
+        model = self._crypto_model if is_crypto else self._model
+        user_prompt = self._build_user_prompt(
+            context, news_context, extra_context=extra_context if is_crypto else ""
+        )
+        return model, user_prompt
+
+    @staticmethod
+    def _read_stream(response) -> Any:
+        """逐块累积流式响应，缓冲区一旦构成完整 JSON 立即返回"""
+        buffer: List[str] = []
+        for chunk in response:
+            try:
+                buffer.append(chunk.text)
+            except ValueError:
+                # 不含文本的分块（如仅携带结束原因）
+                continue
+            try:
+                return from_json(''.join(buffer))
+            except ValueError:
+                continue
+        # 流结束仍未解析成功时走兜底解析（如被代码块包裹）
+        return _load_json(''.join(buffer))
+
+    @staticmethod
+    def _parse_response(res_text: str) -> AnalysisResult:
+        """解析模型返回的 JSON 文本（兼容 Markdown 代码块包裹）"""
+        return AnalysisResult.fast_parse(res_text)
 
     # 使用 **kwargs 确保即使 main.py 传了乱七八糟的参数也不会崩溃
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10))
+    @_ttl_cache(maxsize=1024, ttl=900)
     def analyze(self, context: Dict[str, Any], news_context: Optional[str] = None, 
                 extra_context: str = "", is_crypto: bool = False, **kwargs) -> Optional[AnalysisResult]:
         try:
@@ -45,29 +388,287 @@ class GeminiAnalyzer:
                 logger.error("API KEY 缺失")
                 return None
 
-            # 自动切换 Prompt
-            if is_crypto:
-                system_prompt = f"你是一个加密货币专家。参考情绪：{extra_context}。请输出JSON分析。"
-            else:
-                system_prompt = "你是一个A股分析专家。请输出JSON分析。"
+            model, user_prompt = self._prepare_request(context, news_context, extra_context, is_crypto)
+            return self._analyze_once(model, user_prompt)
 
-            user_data = f"标的：{context.get('stock_name')}，数据：{context}，情报：{news_context}"
-            
-            model = genai.GenerativeModel(
-                model_name=self.model_name,
-                generation_config={"response_mime_type": "application/json", "temperature": 0.2}
-            )
+        except Exception as e:
+            logger.error(f"分析失败: {str(e)}")
+            return None
+
+    @_retry_transient
+    def _analyze_once(self, model: "genai.GenerativeModel", user_prompt: str) -> AnalysisResult:
+        """单次请求并解析；仅瞬时性错误会触发重试"""
+        # 流式接收，JSON 完整即返回，不必等待整个响应结束
+        response = model.generate_content(user_prompt, stream=True)
+        return AnalysisResult.from_dict(self._read_stream(response))
+
+    @_retry_transient
+    async def _analyze_once_async(self, model: "genai.GenerativeModel", user_prompt: str) -> AnalysisResult:
+        """异步单次请求并解析；仅瞬时性错误会触发重试"""
+        response = await model.generate_content_async(user_prompt)
+        return self._parse_response(response.text)
 
-            response = model.generate_content(f"{system_prompt}\n\n数据：{user_data}")
-            
-            # 安全解析
-            res_text = response.text
-            clean_json = re.sub(r'```json\n?|\n?```', '', res_text).strip()
-            return AnalysisResult(**json.loads(clean_json))
+    @_retry_transient
+    def _generate(self, model: "genai.GenerativeModel", prompt: str):
+        """非流式请求（批量分析使用）；仅瞬时性错误会触发重试"""
+        return model.generate_content(prompt)
+
+    @_ttl_cache(maxsize=1024, ttl=900)
+    async def analyze_async(self, context: Dict[str, Any], news_context: Optional[str] = None,
+                            extra_context: str = "", is_crypto: bool = False, **kwargs) -> Optional[AnalysisResult]:
+        """异步版 analyze（generate_content_async），用于并发分析多个标的"""
+        try:
+            if not self.api_key:
+                logger.error("API KEY 缺失")
+                return None
+
+            model, user_prompt = self._prepare_request(context, news_context, extra_context, is_crypto)
+            return await self._analyze_once_async(model, user_prompt)
 
         except Exception as e:
             logger.error(f"分析失败: {str(e)}")
             return None
 
+    async def analyze_many_async(self, contexts: List[Dict[str, Any]], extra_context: str = "",
+                                 is_crypto: bool = False, max_concurrency: int = 16) -> List[Optional[AnalysisResult]]:
+        """
+        并发分析多个标的
+
+        使用信号量限制同时在途的请求数，避免超出账号 RPM 配额。
+
+        Returns:
+            与 contexts 等长、顺序一致的结果列表
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def _run(ctx: Dict[str, Any]) -> Optional[AnalysisResult]:
+            async with semaphore:
+                return await self.analyze_async(ctx, extra_context=extra_context, is_crypto=is_crypto)
+
+        return list(await asyncio.gather(*[_run(ctx) for ctx in contexts]))
+
+    def _build_batch_prompt(self, contexts: List[Dict[str, Any]], news_contexts: List[Optional[str]],
+                            extra_context: str, is_crypto: bool) -> str:
+        """多个标的打包为一个请求，以 <<ITEM i>> 分隔，要求按输入顺序返回 JSON 数组"""
+        blocks = [
+            f"<<ITEM {i + 1}>>\n{self._build_user_prompt(ctx, news)}"
+            for i, (ctx, news) in enumerate(zip(contexts, news_contexts))
+        ]
+        batch_prompt = (
+            f"以下共 {len(contexts)} 个标的，每个以 <<ITEM i>> 开头。\n\n"
+            + "\n\n---\n\n".join(blocks)
+            + f"\n\n请返回长度为 {len(contexts)} 的 JSON 数组，每个标的对应一个对象，保持输入顺序，"
+            + "每个对象的 code 字段填写对应标的代码。"
+        )
+        if is_crypto and extra_context:
+            batch_prompt += f"\n\n参考情绪：{extra_context}"
+        return batch_prompt
+
+    @staticmethod
+    def _parse_batch_response(res_text: str, codes: List[str]) -> List[Optional[AnalysisResult]]:
+        """
+        解析批量响应的 JSON 数组，按 code 字段对应回输入标的
+
+        模型漏项或乱序时按位置对应会让后续结果全部错位（并写入别的标的的缓存），
+        因此只有缺少 code 字段的项才按位置对应。代码不在本批中、重复或校验失败的项丢弃，
+        对应标的保持 None，由调用方逐个重试。
+        """
+        results: List[Optional[AnalysisResult]] = [None] * len(codes)
+        items = _load_json(res_text)
+        if not isinstance(items, list):
+            logger.warning("批量分析返回的不是 JSON 数组")
+            return results
+        index_of = {code: i for i, code in reversed(list(enumerate(codes)))}
+        for position, item in enumerate(items):
+            if not isinstance(item, dict):
+                logger.warning(f"批量分析第 {position + 1} 项不是 JSON 对象")
+                continue
+            code = item.get('code')
+            if code in (None, ''):
+                if position >= len(codes):
+                    continue
+                index = position
+                item = {**item, 'code': codes[index]}
+            else:
+                index = index_of.get(str(code))
+                if index is None:
+                    logger.warning(f"批量分析第 {position + 1} 项的代码 {code} 不在本批标的中")
+                    continue
+            if results[index] is not None:
+                logger.warning(f"批量分析返回了重复的标的 {codes[index]}，忽略后出现的一项")
+                continue
+            try:
+                results[index] = AnalysisResult.from_dict(item)
+            except Exception as e:
+                logger.warning(f"批量分析 {codes[index]} 解析失败: {e}")
+        return results
+
+    def analyze_batch(self, contexts: List[Dict[str, Any]], news_contexts: Optional[List[Optional[str]]] = None,
+                      extra_context: str = "", is_crypto: bool = False) -> List[Optional[AnalysisResult]]:
+        """
+        批量分析：将多个标的打包进一次请求，分摊系统提示词与网络往返开销
+
+        模型被要求返回与输入等长、顺序一致且带 code 字段的 JSON 数组，结果按 code 对应回标的；
+        整体解析失败、漏项、代码对不上或单项校验失败的标的，回退为单独调用 analyze 重试。
+
+        Returns:
+            与 contexts 等长的结果列表，失败项为 None
+        """
+        if not contexts:
+            return []
+        if not self.api_key:
+            logger.error("API KEY 缺失")
+            return [None] * len(contexts)
+
+        news_contexts = news_contexts or [None] * len(contexts)
+        results: List[Optional[AnalysisResult]] = [None] * len(contexts)
+
+        try:
+            model = self._crypto_model if is_crypto else self._model
+            batch_prompt = self._build_batch_prompt(contexts, news_contexts, extra_context, is_crypto)
+            response = self._generate(model, batch_prompt)
+            results = self._parse_batch_response(response.text, [str(ctx.get('code', '')) for ctx in contexts])
+        except Exception as e:
+            logger.error(f"批量分析失败: {str(e)}")
+
+        # 仅对失败项逐个重试
+        for i, result in enumerate(results):
+            if result is None:
+                results[i] = self.analyze(contexts[i], news_contexts[i],
+                                          extra_context=extra_context, is_crypto=is_crypto)
+        return results
+
+    @_retry_transient
+    async def _generate_async(self, model: "genai.GenerativeModel", prompt: str):
+        """异步非流式请求（批量分析使用）；仅瞬时性错误会触发重试"""
+        return await model.generate_content_async(prompt)
+
+    async def analyze_batch_async(self, contexts: List[Dict[str, Any]],
+                                  news_contexts: Optional[List[Optional[str]]] = None,
+                                  extra_context: str = "", is_crypto: bool = False,
+                                  limiter=None) -> List[Optional[AnalysisResult]]:
+        """
+        异步版 analyze_batch；只有一个标的时直接走 analyze_async
+
+        limiter 为调用方的限速器（异步上下文管理器，如 aiolimiter.AsyncLimiter），
+        批量请求与失败项的逐个重试每次请求前都先取得令牌。
+        批量请求因配额耗尽（ResourceExhausted）失败时不再逐个重试，避免在限流时放大请求量。
+        """
+        if not contexts:
+            return []
+        news_contexts = news_contexts or [None] * len(contexts)
+        if limiter is None:
+            limiter = contextlib.nullcontext()
+
+        async def analyze_one(i: int) -> Optional[AnalysisResult]:
+            async with limiter:
+                return await self.analyze_async(contexts[i], news_contexts[i],
+                                                extra_context=extra_context, is_crypto=is_crypto)
+
+        if len(contexts) == 1:
+            return [await analyze_one(0)]
+        if not self.api_key:
+            logger.error("API KEY 缺失")
+            return [None] * len(contexts)
+
+        results: List[Optional[AnalysisResult]] = [None] * len(contexts)
+        try:
+            model = self._crypto_model if is_crypto else self._model
+            batch_prompt = self._build_batch_prompt(contexts, news_contexts, extra_context, is_crypto)
+            async with limiter:
+                response = await self._generate_async(model, batch_prompt)
+            results = self._parse_batch_response(response.text, [str(ctx.get('code', '')) for ctx in contexts])
+        except gexc.ResourceExhausted as e:
+            logger.error(f"批量分析失败，配额已耗尽，本批不再逐个重试: {str(e)}")
+            return results
+        except Exception as e:
+            logger.error(f"批量分析失败: {str(e)}")
+
+        # 仅对失败项并发重试（同样受限速器约束）
+        retry_indexes = [i for i, result in enumerate(results) if result is None]
+        retried = await asyncio.gather(*[analyze_one(i) for i in retry_indexes])
+        for i, result in zip(retry_indexes, retried):
+            results[i] = result
+        return results
+
+    def submit_batch(self, contexts: List[Dict[str, Any]], news_contexts: Optional[List[Optional[str]]] = None,
+                     extra_context: str = "", is_crypto: bool = False,
+                     poll_interval: float = 30.0, timeout: float = 24 * 3600) -> Dict[str, AnalysisResult]:
+        """
+        通过 Gemini Batch API 提交离线批量分析（定时任务等非实时场景，按半价计费）
+
+        每个标的作为一条内联请求提交，轮询任务直到结束后逐条解析。
+        未安装 google-genai 时回退到 analyze_batch。
+
+        Returns:
+            以标的代码为键的分析结果字典（失败项不包含在内）
+        """
+        if not contexts:
+            return {}
+        if not self.api_key:
+            logger.error("API KEY 缺失")
+            return {}
+
+        codes = [str(ctx.get('code', i)) for i, ctx in enumerate(contexts)]
+
+        try:
+            from google import genai as genai_sdk
+        except ImportError:
+            logger.warning("google-genai 未安装，Batch 模式回退为同步批量分析: pip install google-genai")
+            results = self.analyze_batch(contexts, news_contexts, extra_context=extra_context, is_crypto=is_crypto)
+            return {code: result for code, result in zip(codes, results) if result is not None}
+
+        news_contexts = news_contexts or [None] * len(contexts)
+        system_prompt = CRYPTO_SYSTEM_PROMPT if is_crypto else STOCK_SYSTEM_PROMPT
+        inline_requests = [
+            {
+                'contents': [{
+                    'role': 'user',
+                    'parts': [{'text': self._build_user_prompt(
+                        ctx, news, extra_context=extra_context if is_crypto else ""
+                    )}],
+                }],
+                'config': {**self.generation_config, 'system_instruction': system_prompt},
+            }
+            for ctx, news in zip(contexts, news_contexts)
+        ]
+
+        results: Dict[str, AnalysisResult] = {}
+        try:
+            client = genai_sdk.Client(api_key=self.api_key)
+            job = client.batches.create(
+                model=self.model_name,
+                src=inline_requests,
+                config={'display_name': f"daily-analysis-{time.strftime('%Y%m%d-%H%M%S')}"},
+            )
+            logger.info(f"Batch 任务已提交: {job.name}，共 {len(inline_requests)} 条请求")
+
+            finished_states = {'JOB_STATE_SUCCEEDED', 'JOB_STATE_PARTIALLY_SUCCEEDED', 'JOB_STATE_FAILED',
+                               'JOB_STATE_CANCELLED', 'JOB_STATE_EXPIRED'}
+            deadline = time.time() + timeout
+            while job.state.name not in finished_states:
+                if time.time() > deadline:
+                    logger.error(f"Batch 任务 {job.name} 等待超时，状态: {job.state.name}")
+                    return results
+                time.sleep(poll_interval)
+                job = client.batches.get(name=job.name)
+
+            if job.state.name not in ('JOB_STATE_SUCCEEDED', 'JOB_STATE_PARTIALLY_SUCCEEDED'):
+                logger.error(f"Batch 任务 {job.name} 未成功: {job.state.name} {job.error}")
+                return results
+
+            for code, inline_response in zip(codes, job.dest.inlined_responses or []):
+                if inline_response.error or not inline_response.response:
+                    logger.warning(f"[{code}] Batch 请求失败: {inline_response.error}")
+                    continue
+                try:
+                    results[code] = self._parse_response(inline_response.response.text)
+                except Exception as e:
+                    logger.warning(f"[{code}] Batch 结果解析失败: {e}")
+        except Exception as e:
+            logger.error(f"Batch 分析失败: {str(e)}")
+
+        return results
+
 def get_analyzer() -> GeminiAnalyzer:
     return GeminiAnalyzer()
@@ -48,6 +48,7 @@ class Config:
     gemini_request_delay: float = 2.0  # 请求间隔（秒）
     gemini_max_retries: int = 5  # 最大重试次数
     gemini_retry_delay: float = 5.0  # 重试基础延时（秒）
+    gemini_batch_mode: bool = False  # 使用 Gemini Batch API 离线批量分析（非实时，成本减半）
     
     # OpenAI 兼容 API（备选，当 Gemini 不可用时使用）
     openai_api_key: Optional[str] = None
@@ -101,6 +102,12 @@ class Config:
     
     # === 系统配置 ===
     max_workers: int = 3  # 低并发防封禁
+    analysis_concurrency: int = 32  # 同时在途的 AI 分析请求数（异步请求，不占线程）
+    analysis_batch_size: int = 10  # 单次 AI 请求打包的标的数（1 表示逐个分析）
+    skip_stored_today: bool = False  # 今日K线已入库的A股跳过拉取（断点续传；盘中入库的K线未收盘）
+    realtime_quote_enabled: bool = False  # 分析上下文附带A股实时行情（全市场快照，耗时数秒）
+    gemini_rpm: int = 60  # 每分钟最多发起的 AI 分析请求数（0 表示不限速）
+    fetch_rpm: int = 0  # 每分钟最多拉取的标的数（0 表示不限速，仅依赖数据源自身的休眠）
     debug: bool = False
     
     # === 定时任务配置 ===
@@ -191,6 +198,7 @@ class Config:
             gemini_request_delay=float(os.getenv('GEMINI_REQUEST_DELAY', '2.0')),
             gemini_max_retries=int(os.getenv('GEMINI_MAX_RETRIES', '5')),
             gemini_retry_delay=float(os.getenv('GEMINI_RETRY_DELAY', '5.0')),
+            gemini_batch_mode=os.getenv('GEMINI_BATCH_MODE', 'false').lower() == 'true',
             openai_api_key=os.getenv('OPENAI_API_KEY'),
             openai_base_url=os.getenv('OPENAI_BASE_URL'),
             openai_model=os.getenv('OPENAI_MODEL', 'gpt-4o-mini'),
@@ -215,6 +223,12 @@ class Config:
             log_dir=os.getenv('LOG_DIR', './logs'),
             log_level=os.getenv('LOG_LEVEL', 'INFO'),
             max_workers=int(os.getenv('MAX_WORKERS', '3')),
+            analysis_concurrency=int(os.getenv('ANALYSIS_CONCURRENCY', '32')),
+            analysis_batch_size=int(os.getenv('ANALYSIS_BATCH_SIZE', '10')),
+            skip_stored_today=os.getenv('SKIP_STORED_TODAY', 'false').lower() == 'true',
+            realtime_quote_enabled=os.getenv('REALTIME_QUOTE_ENABLED', 'false').lower() == 'true',
+            gemini_rpm=int(os.getenv('GEMINI_RPM', '60')),
+            fetch_rpm=int(os.getenv('FETCH_RPM', '0')),
             debug=os.getenv('DEBUG', 'false').lower() == 'true',
             schedule_enabled=os.getenv('SCHEDULE_ENABLED', 'false').lower() == 'true',
             schedule_time=os.getenv('SCHEDULE_TIME', '18:00'),
@@ -23,7 +23,7 @@ import random
 import time
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 
 import pandas as pd
 from tenacity import (
@@ -37,12 +37,13 @@ from tenacity import (
 from .base import BaseFetcher, DataFetchError, RateLimitError, STANDARD_COLUMNS
 
 
-@dataclass
+@dataclass(slots=True)
 class RealtimeQuote:
     """
     实时行情数据
     
     包含当日实时交易数据和估值指标
+    使用 __slots__：整批快照按代码常驻内存，并直接作为分析上下文的一部分传给 Prompt 构建
     """
     code: str
     name: str = ""
@@ -353,8 +354,7 @@ class AkshareFetcher(BaseFetcher):
             # 调用 akshare 获取 A 股日线数据
             # period="daily" 获取日线数据
             # adjust="qfq" 获取前复权数据
-            import time as _time
-            api_start = _time.time()
+            api_start = time.time()
             
             df = ak.stock_zh_a_hist(
                 symbol=stock_code,
@@ -364,7 +364,7 @@ class AkshareFetcher(BaseFetcher):
                 adjust="qfq"  # 前复权
             )
             
-            api_elapsed = _time.time() - api_start
+            api_elapsed = time.time() - api_start
             
             # 记录返回数据摘要
             if df is not None and not df.empty:
@@ -413,8 +413,7 @@ class AkshareFetcher(BaseFetcher):
                    f"start_date={start_date.replace('-', '')}, end_date={end_date.replace('-', '')}, adjust=qfq)")
         
         try:
-            import time as _time
-            api_start = _time.time()
+            api_start = time.time()
             
             # 调用 akshare 获取 ETF 日线数据
             df = ak.fund_etf_hist_em(
@@ -425,7 +424,7 @@ class AkshareFetcher(BaseFetcher):
                 adjust="qfq"  # 前复权
             )
             
-            api_elapsed = _time.time() - api_start
+            api_elapsed = time.time() - api_start
             
             # 记录返回数据摘要
             if df is not None and not df.empty:
@@ -477,8 +476,7 @@ class AkshareFetcher(BaseFetcher):
                    f"start_date={start_date.replace('-', '')}, end_date={end_date.replace('-', '')}, adjust=qfq)")
         
         try:
-            import time as _time
-            api_start = _time.time()
+            api_start = time.time()
             
             # 调用 akshare 获取港股日线数据
             df = ak.stock_hk_hist(
@@ -489,7 +487,7 @@ class AkshareFetcher(BaseFetcher):
                 adjust="qfq"  # 前复权
             )
             
-            api_elapsed = _time.time() - api_start
+            api_elapsed = time.time() - api_start
             
             # 记录返回数据摘要
             if df is not None and not df.empty:
@@ -571,6 +569,44 @@ class AkshareFetcher(BaseFetcher):
         else:
             return self._get_stock_realtime_quote(stock_code)
     
+    def get_realtime_quote_batch(self, stock_codes: List[str]) -> Dict[str, RealtimeQuote]:
+        """
+        批量获取实时行情数据
+
+        普通 A 股共用一次 ak.stock_zh_a_spot_em() 全市场快照，按代码建索引后 O(1) 查找；
+        ETF / 港股仍按代码调用 get_realtime_quote（各自有快照缓存）。
+
+        Args:
+            stock_codes: 股票/ETF代码列表
+
+        Returns:
+            {代码: RealtimeQuote}，获取失败的代码不包含在内
+        """
+        quotes: Dict[str, RealtimeQuote] = {}
+        a_share_codes = [c for c in stock_codes if not _is_hk_code(c) and not _is_etf_code(c)]
+
+        if a_share_codes:
+            try:
+                df = self._get_stock_spot_snapshot()
+                if df is not None and not df.empty:
+                    rows = df[df['代码'].isin(a_share_codes)].drop_duplicates('代码').set_index('代码', drop=False)
+                    for code in a_share_codes:
+                        if code in rows.index:
+                            quotes[code] = self._build_stock_quote(code, rows.loc[code])
+                        else:
+                            logger.warning(f"[API返回] 未找到股票 {code} 的实时行情")
+            except Exception as e:
+                logger.error(f"[API错误] 批量获取实时行情失败: {e}")
+
+        for code in stock_codes:
+            if code not in a_share_codes:
+                quote = self.get_realtime_quote(code)
+                if quote is not None:
+                    quotes[code] = quote
+
+        logger.info(f"[实时行情] 批量获取完成: {len(quotes)}/{len(stock_codes)}")
+        return quotes
+
     def _get_stock_realtime_quote(self, stock_code: str) -> Optional[RealtimeQuote]:
         """
         获取普通 A 股实时行情数据
@@ -578,44 +614,8 @@ class AkshareFetcher(BaseFetcher):
         数据来源：ak.stock_zh_a_spot_em()
         包含：量比、换手率、市盈率、市净率、总市值、流通市值等
         """
-        import akshare as ak
-        
         try:
-            # 检查缓存
-            current_time = time.time()
-            if (_realtime_cache['data'] is not None and 
-                current_time - _realtime_cache['timestamp'] < _realtime_cache['ttl']):
-                df = _realtime_cache['data']
-                logger.debug(f"[缓存命中] 使用缓存的A股实时行情数据")
-            else:
-                last_error: Optional[Exception] = None
-                df = None
-                for attempt in range(1, 3):
-                    try:
-                        # 防封禁策略
-                        self._set_random_user_agent()
-                        self._enforce_rate_limit()
-
-                        logger.info(f"[API调用] ak.stock_zh_a_spot_em() 获取A股实时行情... (attempt {attempt}/2)")
-                        import time as _time
-                        api_start = _time.time()
-
-                        df = ak.stock_zh_a_spot_em()
-
-                        api_elapsed = _time.time() - api_start
-                        logger.info(f"[API返回] ak.stock_zh_a_spot_em 成功: 返回 {len(df)} 只股票, 耗时 {api_elapsed:.2f}s")
-                        break
-                    except Exception as e:
-                        last_error = e
-                        logger.warning(f"[API错误] ak.stock_zh_a_spot_em 获取失败 (attempt {attempt}/2): {e}")
-                        time.sleep(min(2 ** attempt, 5))
-
-                # 更新缓存：成功缓存数据；失败也缓存空数据，避免同一轮任务对同一接口反复请求
-                if df is None:
-                    logger.error(f"[API错误] ak.stock_zh_a_spot_em 最终失败: {last_error}")
-                    df = pd.DataFrame()
-                _realtime_cache['data'] = df
-                _realtime_cache['timestamp'] = current_time
+            df = self._get_stock_spot_snapshot()
 
             if df is None or df.empty:
                 logger.warning(f"[实时行情] A股实时行情数据为空，跳过 {stock_code}")
@@ -627,35 +627,7 @@ class AkshareFetcher(BaseFetcher):
                 logger.warning(f"[API返回] 未找到股票 {stock_code} 的实时行情")
                 return None
             
-            row = row.iloc[0]
-            
-            # 安全获取字段值
-            def safe_float(val, default=0.0):
-                try:
-                    if pd.isna(val):
-                        return default
-                    return float(val)
-                except:
-                    return default
-            
-            quote = RealtimeQuote(
-                code=stock_code,
-                name=str(row.get('名称', '')),
-                price=safe_float(row.get('最新价')),
-                change_pct=safe_float(row.get('涨跌幅')),
-                change_amount=safe_float(row.get('涨跌额')),
-                volume_ratio=safe_float(row.get('量比')),
-                turnover_rate=safe_float(row.get('换手率')),
-                amplitude=safe_float(row.get('振幅')),
-                pe_ratio=safe_float(row.get('市盈率-动态')),
-                pb_ratio=safe_float(row.get('市净率')),
-                total_mv=safe_float(row.get('总市值')),
-                circ_mv=safe_float(row.get('流通市值')),
-                change_60d=safe_float(row.get('60日涨跌幅')),
-                high_52w=safe_float(row.get('52周最高')),
-                low_52w=safe_float(row.get('52周最低')),
-            )
-            
+            quote = self._build_stock_quote(stock_code, row.iloc[0])
             logger.info(f"[实时行情] {stock_code} {quote.name}: 价格={quote.price}, 涨跌={quote.change_pct}%, "
                        f"量比={quote.volume_ratio}, 换手率={quote.turnover_rate}%, "
                        f"PE={quote.pe_ratio}, PB={quote.pb_ratio}")
@@ -664,7 +636,82 @@ class AkshareFetcher(BaseFetcher):
         except Exception as e:
             logger.error(f"[API错误] 获取 {stock_code} 实时行情失败: {e}")
             return None
-    
+
+    def _get_stock_spot_snapshot(self) -> Optional[pd.DataFrame]:
+        """
+        获取 A 股全市场实时行情快照（带 60 秒缓存）
+
+        失败时缓存空数据，避免同一轮任务对同一接口反复请求
+        """
+        import akshare as ak
+
+        # 检查缓存
+        current_time = time.time()
+        if (_realtime_cache['data'] is not None and 
+            current_time - _realtime_cache['timestamp'] < _realtime_cache['ttl']):
+            logger.debug(f"[缓存命中] 使用缓存的A股实时行情数据")
+            return _realtime_cache['data']
+
+        last_error: Optional[Exception] = None
+        df = None
+        for attempt in range(1, 3):
+            try:
+                # 防封禁策略
+                self._set_random_user_agent()
+                self._enforce_rate_limit()
+
+                logger.info(f"[API调用] ak.stock_zh_a_spot_em() 获取A股实时行情... (attempt {attempt}/2)")
+                api_start = time.time()
+
+                df = ak.stock_zh_a_spot_em()
+
+                api_elapsed = time.time() - api_start
+                logger.info(f"[API返回] ak.stock_zh_a_spot_em 成功: 返回 {len(df)} 只股票, 耗时 {api_elapsed:.2f}s")
+                break
+            except Exception as e:
+                last_error = e
+                logger.warning(f"[API错误] ak.stock_zh_a_spot_em 获取失败 (attempt {attempt}/2): {e}")
+                time.sleep(min(2 ** attempt, 5))
+
+        # 更新缓存：成功缓存数据；失败也缓存空数据，避免同一轮任务对同一接口反复请求
+        if df is None:
+            logger.error(f"[API错误] ak.stock_zh_a_spot_em 最终失败: {last_error}")
+            df = pd.DataFrame()
+        _realtime_cache['data'] = df
+        _realtime_cache['timestamp'] = current_time
+
+        return df
+
+    @staticmethod
+    def _build_stock_quote(stock_code: str, row: pd.Series) -> RealtimeQuote:
+        """将 ak.stock_zh_a_spot_em() 的一行数据转换为 RealtimeQuote"""
+        # 安全获取字段值
+        def safe_float(val, default=0.0):
+            try:
+                if pd.isna(val):
+                    return default
+                return float(val)
+            except:
+                return default
+        
+        return RealtimeQuote(
+            code=stock_code,
+            name=str(row.get('名称', '')),
+            price=safe_float(row.get('最新价')),
+            change_pct=safe_float(row.get('涨跌幅')),
+            change_amount=safe_float(row.get('涨跌额')),
+            volume_ratio=safe_float(row.get('量比')),
+            turnover_rate=safe_float(row.get('换手率')),
+            amplitude=safe_float(row.get('振幅')),
+            pe_ratio=safe_float(row.get('市盈率-动态')),
+            pb_ratio=safe_float(row.get('市净率')),
+            total_mv=safe_float(row.get('总市值')),
+            circ_mv=safe_float(row.get('流通市值')),
+            change_60d=safe_float(row.get('60日涨跌幅')),
+            high_52w=safe_float(row.get('52周最高')),
+            low_52w=safe_float(row.get('52周最低')),
+        )
+
     def _get_etf_realtime_quote(self, stock_code: str) -> Optional[RealtimeQuote]:
         """
         获取 ETF 基金实时行情数据
@@ -697,12 +744,11 @@ class AkshareFetcher(BaseFetcher):
                         self._enforce_rate_limit()
 
                         logger.info(f"[API调用] ak.fund_etf_spot_em() 获取ETF实时行情... (attempt {attempt}/2)")
-                        import time as _time
-                        api_start = _time.time()
+                        api_start = time.time()
 
                         df = ak.fund_etf_spot_em()
 
-                        api_elapsed = _time.time() - api_start
+                        api_elapsed = time.time() - api_start
                         logger.info(f"[API返回] ak.fund_etf_spot_em 成功: 返回 {len(df)} 只ETF, 耗时 {api_elapsed:.2f}s")
                         break
                     except Exception as e:
@@ -788,12 +834,11 @@ class AkshareFetcher(BaseFetcher):
             code = stock_code.lower().replace('hk', '').zfill(5)
             
             logger.info(f"[API调用] ak.stock_hk_spot_em() 获取港股实时行情...")
-            import time as _time
-            api_start = _time.time()
+            api_start = time.time()
             
             df = ak.stock_hk_spot_em()
             
-            api_elapsed = _time.time() - api_start
+            api_elapsed = time.time() - api_start
             logger.info(f"[API返回] ak.stock_hk_spot_em 成功: 返回 {len(df)} 只港股, 耗时 {api_elapsed:.2f}s")
             
             # 查找指定港股
@@ -868,12 +913,11 @@ class AkshareFetcher(BaseFetcher):
             self._enforce_rate_limit()
             
             logger.info(f"[API调用] ak.stock_cyq_em(symbol={stock_code}) 获取筹码分布...")
-            import time as _time
-            api_start = _time.time()
+            api_start = time.time()
             
             df = ak.stock_cyq_em(symbol=stock_code)
             
-            api_elapsed = _time.time() - api_start
+            api_elapsed = time.time() - api_start
             
             if df.empty:
                 logger.warning(f"[API返回] ak.stock_cyq_em 返回空数据, 耗时 {api_elapsed:.2f}s")
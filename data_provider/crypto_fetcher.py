@@ -1,15 +1,93 @@
-import yfinance as yf
+import numpy as np
 import pandas as pd
 import requests
 import logging
-from typing import Optional
+import math
+import threading
+import time
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# 可选依赖：安装 numba 时对长周期K线的派生列计算进行 JIT 编译
+from numba_compat import HAS_NUMBA, njit
+
+if TYPE_CHECKING:
+    import yfinance as yf
 
 # 配置日志
 logger = logging.getLogger(__name__)
 
+
+def _valid_price(value) -> float:
+    """转换为有效价格，None / NaN / inf / 非正数返回 0.0"""
+    try:
+        price = float(value)
+    except (TypeError, ValueError):
+        return 0.0
+    return price if math.isfinite(price) and price > 0 else 0.0
+
+
+@njit(cache=True)
+def _diff_and_pct_loop(close: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """单次遍历同时计算涨跌额与涨跌幅（numba 编译用），第一行为 0"""
+    n = close.shape[0]
+    change = np.zeros(n)
+    pct_change = np.zeros(n)
+    for i in range(1, n):
+        diff = close[i] - close[i - 1]
+        change[i] = diff
+        pct_change[i] = 0.0 if close[i - 1] == 0 else diff / close[i - 1] * 100.0
+    return change, pct_change
+
+
+def _diff_and_pct_numpy(close: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """NumPy 向量化计算涨跌额与涨跌幅，第一行为 0"""
+    change = np.zeros_like(close)
+    change[1:] = close[1:] - close[:-1]
+    pct_change = np.zeros_like(close)
+    prev_close = close[:-1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pct_change[1:] = np.where(prev_close == 0, 0.0, change[1:] / prev_close * 100)
+    return change, pct_change
+
+
+# 未安装 numba 时逐元素循环以 Python 执行较慢，改用向量化实现
+_diff_and_pct = _diff_and_pct_loop if HAS_NUMBA else _diff_and_pct_numpy
+
+
 class CryptoFetcher:
-    def __init__(self):
+    # 缓存有效期（秒）：恐慌贪婪指数每日更新，BTC 24h 走势变化缓慢；实时价格仅吸收短时突发请求
+    SENTIMENT_CACHE_TTL = 1800
+    PRICE_CACHE_TTL = 30
+
+    def __init__(self, session: Optional[requests.Session] = None):
         self.fng_url = "https://api.alternative.me/fng/"
+        self.quote_url = "https://query1.finance.yahoo.com/v7/finance/quote"
+        # 复用 HTTP 连接（keep-alive），避免每次请求重新建立 TCP + TLS；可由调用方注入共享会话
+        if session is None:
+            session = requests.Session()
+            session.mount('https://', HTTPAdapter(
+                pool_connections=4,
+                pool_maxsize=16,
+                max_retries=Retry(total=3, backoff_factor=0.5),
+            ))
+        self._session = session
+        # yfinance 内部使用全局共享会话，这里只缓存 Ticker 对象以复用其元数据
+        self._tickers: Dict[str, "yf.Ticker"] = {}
+        # (值, 过期时间戳)
+        self._sentiment_cache: Optional[Tuple[str, float]] = None
+        self._sentiment_lock = threading.Lock()
+        self._price_cache: Dict[str, Tuple[float, float]] = {}
+
+    def _get_ticker(self, symbol: str) -> "yf.Ticker":
+        """获取（并缓存）yfinance Ticker 对象"""
+        import yfinance as yf
+
+        ticker = self._tickers.get(symbol)
+        if ticker is None:
+            ticker = self._tickers[symbol] = yf.Ticker(symbol)
+        return ticker
 
     def get_crypto_data(self, symbol: str, days: int = 100) -> Optional[pd.DataFrame]:
         """
@@ -17,57 +95,101 @@ class CryptoFetcher:
         :param symbol: 交易对名称，如 'BTC-USD', 'ETH-USD'
         :param days: 获取天数
         """
+        return self.get_many([symbol], days).get(symbol)
+
+    def get_many(self, symbols: List[str], days: int = 100) -> Dict[str, pd.DataFrame]:
+        """
+        一次 yf.download 批量获取多个币种的K线数据并标准化
+
+        yfinance 在一次调用内并发下载多个标的，N 个币种只需一次调用
+        :param symbols: 交易对名称列表，如 ['BTC-USD', 'ETH-USD']
+        :param days: 获取天数
+        :return: {symbol: DataFrame}，获取失败的币种不包含在内
+        """
+        if not symbols:
+            return {}
+
+        # 延迟导入：自选股全为A股时不加载 yfinance
+        import yfinance as yf
+
         try:
-            logger.info(f"正在从 yfinance 获取 {symbol} 的K线数据...")
+            logger.info(f"正在从 yfinance 获取 {', '.join(symbols)} 的K线数据...")
             # 获取数据，虚拟货币 7x24 交易，无需考虑开盘时间
-            df = yf.download(symbol, period=f"{days}d", interval="1d", progress=False)
-            
-            if df.empty:
-                logger.warning(f"{symbol} 未能获取到数据，请检查代码拼写是否正确（如 BTC-USD）。")
-                return None
-
-            # 重置索引，将 Date 变为一列
-            df = df.reset_index()
-            
-            # 处理 yfinance 可能返回的多级表头 (MultiIndex)
-            if isinstance(df.columns, pd.MultiIndex):
-                df.columns = df.columns.get_level_values(0)
-
-            # 统一列名为小写，适配原项目的 analyzer 逻辑
-            df = df.rename(columns={
-                'Date': 'date',
-                'Open': 'open',
-                'High': 'high',
-                'Low': 'low',
-                'Close': 'close',
-                'Volume': 'volume'
-            })
-
-            # 将日期转换为字符串 YYYY-MM-DD
-            df['date'] = df['date'].dt.strftime('%Y-%m-%d')
-            
-            # 计算技术指标所需的基础列
-            df['change'] = df['close'].diff()
-            df['pct_change'] = df['close'].pct_change() * 100
-            
-            # 填充第一行的 NaN
-            df = df.fillna(0)
-            
-            return df
-
+            raw = yf.download(
+                ' '.join(symbols), period=f"{days}d", interval="1d",
+                group_by='ticker', threads=True, progress=False
+            )
         except Exception as e:
-            logger.error(f"获取 {symbol} K线数据时发生异常: {str(e)}")
-            return None
+            logger.error(f"获取 {', '.join(symbols)} K线数据时发生异常: {str(e)}")
+            return {}
+
+        result: Dict[str, pd.DataFrame] = {}
+        for symbol in symbols:
+            try:
+                # group_by='ticker' 时列为 (代码, 字段) 两级表头
+                if isinstance(raw.columns, pd.MultiIndex):
+                    if symbol not in raw.columns.get_level_values(0):
+                        df = pd.DataFrame()
+                    else:
+                        df = raw[symbol]
+                else:
+                    df = raw
+                # 多个标的按日期对齐后，缺失的日期整行为空
+                df = df.dropna(how='all')
+
+                if df.empty:
+                    logger.warning(f"{symbol} 未能获取到数据，请检查代码拼写是否正确（如 BTC-USD）。")
+                    continue
+
+                result[symbol] = self._normalize_data(df)
+            except Exception as e:
+                logger.error(f"获取 {symbol} K线数据时发生异常: {str(e)}")
+        return result
+
+    @staticmethod
+    def _normalize_data(df: pd.DataFrame) -> pd.DataFrame:
+        """标准化单个币种的 yfinance K线数据"""
+        # 处理 yfinance 可能返回的多级表头 (MultiIndex)
+        if isinstance(df.columns, pd.MultiIndex):
+            df.columns = df.columns.get_level_values(0)
+
+        # 统一列名为小写（适配原项目的 analyzer 逻辑），并将日期索引变为 date 列
+        # 日期保留 datetime64 类型，由下游按需格式化，避免转为 object 字符串列
+        df = df.rename(columns=str.lower).rename_axis('date').reset_index()
+
+        # 计算技术指标所需的基础列：基于同一 float64 数组一次算出，第一行置 0
+        close = np.ascontiguousarray(df['close'].to_numpy(dtype=np.float64))
+        change, pct_change = _diff_and_pct(close)
+        # 仅派生列可能出现 NaN（原始收盘价缺失），定向填充而非整表 fillna 复制
+        df['change'] = np.nan_to_num(change, copy=False, nan=0.0)
+        df['pct_change'] = np.nan_to_num(pct_change, copy=False, nan=0.0)
+
+        return df
 
     def get_onchain_sentiment(self) -> str:
         """
         获取加密货币特有的市场情绪面数据（链上及情绪指标）
+
+        结果缓存 30 分钟，同一批次分析多个币种时只请求一次
         """
+        # 加锁：并发的多个币种只有一个线程发起请求，其余等待后直接命中缓存
+        with self._sentiment_lock:
+            cached = self._sentiment_cache
+            if cached is not None and cached[1] > time.time():
+                logger.debug("[缓存命中] 使用缓存的加密货币情绪数据")
+                return cached[0]
+
+            sentiment_report = self._fetch_onchain_sentiment()
+            self._sentiment_cache = (sentiment_report, time.time() + self.SENTIMENT_CACHE_TTL)
+            return sentiment_report
+
+    def _fetch_onchain_sentiment(self) -> str:
+        """请求恐慌贪婪指数与 BTC 走势，生成情绪参考文本"""
         sentiment_report = "\n【加密货币专项参考数据】\n"
         
         # 1. 获取恐慌与贪婪指数 (Fear & Greed Index)
         try:
-            response = requests.get(self.fng_url, timeout=10)
+            response = self._session.get(self.fng_url, timeout=10)
             if response.status_code == 200:
                 data = response.json()
                 fng_val = data['data'][0]['value']
@@ -85,7 +207,7 @@ class CryptoFetcher:
 
         # 2. 获取大盘参考指标 (以 BTC 为基准)
         try:
-            btc = yf.Ticker("BTC-USD")
+            btc = self._get_ticker("BTC-USD")
             # 尝试获取市值等信息 (GitHub Actions 运行环境 IP 有时会被限制获取 info)
             # 我们通过 history 获取最近两天的收盘价计算简单趋势
             hist = btc.history(period="2d")
@@ -100,10 +222,66 @@ class CryptoFetcher:
         return sentiment_report
 
     def get_realtime_price(self, symbol: str) -> float:
-        """获取当前最新实时价格"""
+        """获取当前最新实时价格（30 秒缓存）"""
+        cached = self._price_cache.get(symbol)
+        if cached is not None and cached[1] > time.time():
+            return cached[0]
+
+        price = self._fetch_realtime_price(symbol)
+        if price > 0:
+            self._price_cache[symbol] = (price, time.time() + self.PRICE_CACHE_TTL)
+        return price
+
+    def get_realtime_prices(self, symbols: List[str]) -> Dict[str, float]:
+        """
+        批量获取多个币种的最新价格
+
+        通过 Yahoo quote 接口一次请求全部标的；该接口可能要求 crumb 认证，
+        请求失败或缺失的标的逐个回退到 get_realtime_price
+        """
+        now = time.time()
+        prices: Dict[str, float] = {}
+        pending = []
+        for symbol in symbols:
+            cached = self._price_cache.get(symbol)
+            if cached is not None and cached[1] > now:
+                prices[symbol] = cached[0]
+            else:
+                pending.append(symbol)
+
+        if pending:
+            try:
+                response = self._session.get(
+                    self.quote_url, params={'symbols': ','.join(pending)}, timeout=10
+                )
+                if response.status_code == 200:
+                    for item in response.json().get('quoteResponse', {}).get('result', []):
+                        price = _valid_price(item.get('regularMarketPrice'))
+                        if item.get('symbol') in pending and price:
+                            prices[item['symbol']] = price
+                            self._price_cache[item['symbol']] = (price, now + self.PRICE_CACHE_TTL)
+                else:
+                    logger.debug(f"批量报价接口返回 {response.status_code}，逐个获取")
+            except Exception as e:
+                logger.debug(f"批量报价接口请求失败，逐个获取: {e}")
+
+        for symbol in pending:
+            if symbol not in prices:
+                prices[symbol] = self.get_realtime_price(symbol)
+        return prices
+
+    def _fetch_realtime_price(self, symbol: str) -> float:
+        """从 yfinance 请求最新价格，失败返回 0.0"""
+        ticker = self._get_ticker(symbol)
+        # 优先读取 fast_info 中的最新价，避免下载整日 1 分钟K线；取不到有效值（含 NaN）时回退
+        try:
+            price = _valid_price(ticker.fast_info['last_price'])
+            if price:
+                return price
+        except Exception:
+            pass
         try:
-            ticker = yf.Ticker(symbol)
             data = ticker.history(period="1d", interval="1m")
-            return data['Close'].iloc[-1] if not data.empty else 0.0
+            return _valid_price(data['Close'].iloc[-1]) if not data.empty else 0.0
         except Exception:
             return 0.0
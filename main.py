@@ -1,15 +1,23 @@
 # -*- coding: utf-8 -*-
 import os
 import argparse
+import asyncio
+import atexit
 import logging
+import queue
 import sys
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, date
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
 from typing import List, Dict, Any, Optional, Tuple
 
+import requests
+from aiolimiter import AsyncLimiter
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
 from config import get_config, Config
 from storage import get_db
 from data_provider import DataFetcherManager
@@ -18,7 +26,6 @@ from data_provider.akshare_fetcher import AkshareFetcher
 from analyzer import GeminiAnalyzer, AnalysisResult, STOCK_NAME_MAP
 from search_service import SearchService
 from stock_analyzer import StockTrendAnalyzer
-from market_analyzer import MarketAnalyzer
 
 # === 兼容性处理：尝试导入通知组件 ===
 try:
@@ -40,87 +47,493 @@ except ImportError:
 LOG_FORMAT = '%(asctime)s | %(levelname)-8s | %(name)-20s | %(message)s'
 logger = logging.getLogger(__name__)
 
+_log_listener: Optional[QueueListener] = None
+
+def _stop_log_listener() -> None:
+    """停止后台日志线程（退出前把队列中剩余的日志写完）"""
+    global _log_listener
+    if _log_listener is not None:
+        _log_listener.stop()
+        _log_listener = None
+
+atexit.register(_stop_log_listener)
+
 def setup_logging(debug: bool = False, log_dir: str = "./logs") -> None:
+    """
+    工作线程只把日志记录放入队列，格式化与写控制台/文件由 QueueListener 的后台线程完成，
+    避免磁盘写入阻塞抓取与分析
+    """
+    global _log_listener
     level = logging.DEBUG if debug else logging.INFO
     log_path = Path(log_dir)
     log_path.mkdir(parents=True, exist_ok=True)
+    formatter = logging.Formatter(LOG_FORMAT)
     console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setFormatter(logging.Formatter(LOG_FORMAT))
-    logging.getLogger().addHandler(console_handler)
-    logging.getLogger().setLevel(level)
+    console_handler.setFormatter(formatter)
+    file_handler = RotatingFileHandler(
+        log_path / "stock_analysis.log", maxBytes=10 * 1024 * 1024, backupCount=5, encoding='utf-8'
+    )
+    file_handler.setFormatter(formatter)
+
+    _stop_log_listener()
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    _log_listener = QueueListener(log_queue, console_handler, file_handler, respect_handler_level=True)
+    _log_listener.start()
+
+    root_logger = logging.getLogger()
+    for handler in [h for h in root_logger.handlers if isinstance(h, QueueHandler)]:
+        root_logger.removeHandler(handler)
+    root_logger.addHandler(QueueHandler(log_queue))
+    root_logger.setLevel(level)
 
 class StockAnalysisPipeline:
+    # 分析阶段攒批时，拿到第一个标的后最多等待的秒数
+    BATCH_LINGER_SECONDS = 2.0
+    # 趋势分析使用的历史行情天数（随分析上下文一次批量读取）
+    TREND_HISTORY_DAYS = 60
+    # 入库、上下文/缓存读写及情绪数据请求使用的线程数（SQLite 写入本身串行，无需更多）
+    ANALYZE_WORKERS = 4
+
     def __init__(self, config: Optional[Config] = None, max_workers: Optional[int] = None):
         self.config = config or get_config()
         self.max_workers = max_workers or self.config.max_workers
         self.db = get_db()
+        # 全流程共享的 HTTP 连接池（keep-alive），各服务复用连接避免重复 TCP + TLS 握手
+        self.http = requests.Session()
+        self.http.mount('https://', HTTPAdapter(
+            pool_connections=32,
+            pool_maxsize=64,
+            max_retries=Retry(total=3, backoff_factor=0.3),
+        ))
         self.fetcher_manager = DataFetcherManager()
-        self.crypto_fetcher = CryptoFetcher()
+        self.crypto_fetcher = CryptoFetcher(session=self.http)
         self.akshare_fetcher = AkshareFetcher()
-        self.trend_analyzer = StockTrendAnalyzer()
         self.analyzer = GeminiAnalyzer()
-        self.notifier = NotificationService()
+        self.trend_analyzer = StockTrendAnalyzer()
+        self.notifier = NotificationService(session=self.http)
         self.search_service = SearchService(
             bocha_keys=self.config.bocha_api_keys,
             tavily_keys=self.config.tavily_api_keys,
             serpapi_keys=self.config.serpapi_keys,
+            session=self.http,
+            db=self.db,
         )
+        # 本轮运行预取的加密货币K线（一次 yf.download 获取全部币种）
+        self._crypto_data: Dict[str, Any] = {}
+        # 本轮运行预取的A股实时行情（REALTIME_QUOTE_ENABLED 开启时，一次全市场快照覆盖全部代码）
+        self._quote_snapshot: Dict[str, Any] = {}
+        # run_async 期间与拉取阶段并行获取快照的任务，分析前等待其完成
+        self._quote_task: Optional["asyncio.Future[None]"] = None
+        # run_async 期间执行数据源拉取（阻塞 SDK 调用）的线程池，大小即 max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # run_async 期间入库与分析阶段的阻塞调用（数据库、缓存、情绪数据）使用的独立线程池，
+        # 避免排在拉取任务之后，也不挤占拉取的并发度
+        self._analyze_executor: Optional[ThreadPoolExecutor] = None
+        # run_async 期间的全局限速器（令牌桶），等待令牌时只挂起协程，不占线程
+        self._gemini_limiter: Optional[AsyncLimiter] = None
+        self._fetch_limiter: Optional[AsyncLimiter] = None
+        # 本轮运行的日期，run() 开始时取一次，各 worker 共用（跨零点运行时缓存日期也保持一致）
+        self._run_date: Optional[date] = None
+        # 代码 -> (是否加密货币, 名称)，run() 开始时为全部代码预先计算
+        self._code_info: Dict[str, Tuple[bool, str]] = {}
 
     def is_crypto(self, code: str) -> bool:
-        return any(c.isalpha() for c in code)
+        return self.code_info(code)[0]
+
+    def code_info(self, code: str) -> Tuple[bool, str]:
+        """返回 (是否加密货币, 名称)；A股代码为纯数字，其余（BTC-USD 等）按加密货币处理"""
+        info = self._code_info.get(code)
+        if info is None:
+            info = self._code_info[code] = (bool(code) and not code.isdigit(), STOCK_NAME_MAP.get(code, code))
+        return info
+
+    def load_quote_snapshot(self, equity_codes: List[str]) -> None:
+        """获取A股实时行情快照（全市场分页请求，耗时数秒），失败时不附带实时行情"""
+        try:
+            self._quote_snapshot = self.akshare_fetcher.get_realtime_quote_batch(equity_codes)
+        except Exception as e:
+            logger.warning(f"实时行情快照获取失败: {e}")
+            self._quote_snapshot = {}
 
-    def fetch_and_save_stock_data(self, code: str) -> Tuple[bool, Optional[str]]:
+    def fetch_stock_data(self, code: str) -> Tuple[Any, str, Optional[str]]:
+        """拉取日线数据但不入库，返回 (df, 数据源, 错误信息)；写库由调用方合并为批量事务"""
         try:
             if self.is_crypto(code):
-                df = self.crypto_fetcher.get_crypto_data(code)
+                df = self._crypto_data.pop(code, None)
+                if df is None:
+                    df = self.crypto_fetcher.get_crypto_data(code)
                 source = "yfinance"
             else:
                 df, source = self.fetcher_manager.get_daily_data(code, days=30)
-            if df is None or df.empty: return False, "数据为空"
-            self.db.save_daily_data(df, code, source)
-            return True, None
-        except Exception as e: return False, str(e)
+            if df is None or df.empty: return None, source, "数据为空"
+            return df, source, None
+        except Exception as e: return None, "", str(e)
 
-    def analyze_stock(self, code: str) -> Optional[AnalysisResult]:
+    def save_fetched_data(self, fetched: List[Tuple[str, Any, str]]) -> Dict[str, Optional[str]]:
+        """
+        一个事务写入多只标的的日线，返回 {代码: 错误信息或 None}
+
+        整批写入失败时逐个重试，只让出错的标的失败
+        """
         try:
-            is_crypto_asset = self.is_crypto(code)
-            stock_name = STOCK_NAME_MAP.get(code, code)
-            extra_data = self.crypto_fetcher.get_onchain_sentiment() if is_crypto_asset else ""
-            
-            context = self.db.get_analysis_context(code)
-            if not context: return None
-            
-            # AI 分析
-            return self.analyzer.analyze(context, extra_context=extra_data, is_crypto=is_crypto_asset)
+            self.db.save_daily_data_bulk(fetched)
+            return {code: None for code, _, _ in fetched}
+        except Exception as e:
+            if len(fetched) == 1:
+                return {fetched[0][0]: str(e)}
+        errors: Dict[str, Optional[str]] = {}
+        for code, df, source in fetched:
+            try:
+                self.db.save_daily_data(df, code, source)
+                errors[code] = None
+            except Exception as e:
+                errors[code] = str(e)
+        return errors
+
+    def get_analysis_context(self, code: str, context: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        if context is None:
+            context = self.db.get_analysis_context_bulk([code], self.TREND_HISTORY_DAYS).get(code)
+        if not context:
+            return context
+        stock_name = self.code_info(code)[1]
+        if stock_name != code:
+            context['stock_name'] = stock_name
+        realtime_quote = self._quote_snapshot.get(code)
+        if realtime_quote is not None:
+            # 直接挂载快照对象，Prompt 构建时按字段读取，不再为每个代码复制一份字典
+            context['realtime'] = realtime_quote
+        # 趋势分析直接使用随上下文读取的列数组，不构造 DataFrame（60 根K线约数十微秒，在当前线程计算）。
+        # 数组只用于计算，取出后不进入 Prompt 与缓存键
+        bars = context.pop('history', None)
+        if bars:
+            trend = self.trend_analyzer.analyze_arrays(bars['close'], bars['high'], bars['volume'], code)
+            if trend.ma20 > 0:
+                context['trend_analysis'] = trend.to_dict()
+        return context
+
+    async def analyze_stock(self, code: str, context: Optional[Dict[str, Any]] = None) -> Optional[AnalysisResult]:
+        results = await self.analyze_stocks([code], {code: context} if context else None)
+        return results[0] if results else None
+
+    async def _get_sentiment(self) -> str:
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self._analyze_executor, self.crypto_fetcher.get_onchain_sentiment)
         except Exception as e:
-            logger.error(f"[{code}] 分析异常: {e}")
-            return None
+            logger.error(f"情绪数据获取异常: {e}")
+            return ""
+
+    async def _prepare_analysis(self, code: str, context: Optional[Dict[str, Any]],
+                                sentiment: Optional["asyncio.Future[str]"]
+                                ) -> Tuple[Optional[Dict[str, Any]], str, Optional[AnalysisResult]]:
+        """
+        读取分析上下文并查询当日持久化缓存，返回 (context, cache_key, 缓存结果)
+
+        上下文读取与情绪数据请求（sentiment，加密货币才有）同时进行，缓存键依赖两者，最后再查缓存
+        """
+        loop = asyncio.get_running_loop()
+        if self._quote_task is not None:
+            await self._quote_task
+        context = await loop.run_in_executor(self._analyze_executor, self.get_analysis_context, code, context)
+        if not context:
+            return None, "", None
+        extra_data = await sentiment if sentiment is not None else ""
+        cache_key = self.analyzer.cache_key(context, extra_context=extra_data, is_crypto=self.is_crypto(code))
+        try:
+            cached = await loop.run_in_executor(self._analyze_executor, self.db.get_cached_result,
+                                                'analysis', cache_key, self._run_date)
+            return context, cache_key, AnalysisResult.fast_parse(cached) if cached else None
+        except Exception as e:
+            # 缓存不可用（如数据库被锁）时按未命中处理
+            logger.warning(f"[{code}] 读取分析缓存失败: {e}")
+            return context, cache_key, None
+
+    async def analyze_stocks(self, codes: List[str],
+                             contexts: Optional[Dict[str, Dict[str, Any]]] = None) -> List[AnalysisResult]:
+        """
+        分析一组标的
+
+        命中当日缓存（定时任务重跑、重试）的直接返回，其余按资产类型打包为一次批量请求，
+        分摊系统提示词与网络往返开销。
+        """
+        loop = asyncio.get_running_loop()
+        contexts = contexts or {}
+        # 情绪数据与各标的上下文读取互不依赖，并发进行
+        sentiment = (asyncio.ensure_future(self._get_sentiment())
+                     if any(self.is_crypto(code) for code in codes) else None)
+        prepared = await asyncio.gather(
+            *[self._prepare_analysis(code, contexts.get(code), sentiment if self.is_crypto(code) else None)
+              for code in codes],
+            return_exceptions=True,
+        )
+        extra_data = await sentiment if sentiment is not None else ""
+
+        results: List[AnalysisResult] = []
+        # is_crypto -> [(code, context, cache_key)]
+        pending: Dict[bool, List[Tuple[str, Dict[str, Any], str]]] = {False: [], True: []}
+        for code, item in zip(codes, prepared):
+            if isinstance(item, Exception):
+                logger.error(f"[{code}] 分析异常: {item}")
+                continue
+            context, cache_key, cached = item
+            if cached is not None:
+                logger.info(f"[{code}] 命中当日分析缓存")
+                results.append(cached)
+            elif context:
+                pending[self.is_crypto(code)].append((code, context, cache_key))
+
+        for is_crypto_asset, items in pending.items():
+            if not items: continue
+            # AI 分析：批量请求及失败项的逐个重试都受 Gemini 限速器约束（未配置时不限速）
+            try:
+                batch_results = await self.analyzer.analyze_batch_async(
+                    [context for _, context, _ in items],
+                    extra_context=extra_data if is_crypto_asset else "",
+                    is_crypto=is_crypto_asset,
+                    limiter=self._gemini_limiter,
+                )
+            except Exception as e:
+                logger.error(f"[{', '.join(code for code, _, _ in items)}] 分析异常: {e}")
+                continue
+            for (code, _, cache_key), result in zip(items, batch_results):
+                if result is None: continue
+                results.append(result)
+                # 缓存写入失败（如数据库被锁）不影响本次结果
+                try:
+                    await loop.run_in_executor(self._analyze_executor, self.db.save_cached_result,
+                                               'analysis', cache_key, result.model_dump_json(), code, self._run_date)
+                except Exception as e:
+                    logger.warning(f"[{code}] 写入分析缓存失败: {e}")
+        return results
 
     def run(self, stock_codes: Optional[List[str]] = None):
         if stock_codes is None: stock_codes = self.config.stock_list
-        results = []
-        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            futures = {executor.submit(self.process_task, code): code for code in stock_codes}
-            for f in as_completed(futures):
-                res = f.result()
-                if res: results.append(res)
+        self._run_date = date.today()
+        # 按本轮代码重新计算分类与名称，worker 中只做字典查找
+        self._code_info = {}
+        for code in stock_codes:
+            self.code_info(code)
+        crypto_codes = [code for code in stock_codes if self.is_crypto(code)]
+        self._crypto_data = self.crypto_fetcher.get_many(crypto_codes) if crypto_codes else {}
+        equity_codes = [code for code in stock_codes if not self.is_crypto(code)]
+        self._quote_snapshot = {}
+        # 断点续传（SKIP_STORED_TODAY，默认关闭）：今日K线已入库的A股跳过拉取。
+        # 盘中运行存入的是未收盘的K线，收盘后重跑需要重新拉取，因此只在明确开启时跳过；
+        # 加密货币 24 小时交易，当日K线始终需要刷新
+        cached_codes = (self.db.has_today_data_bulk(equity_codes, self._run_date)
+                        if self.config.skip_stored_today and equity_codes else set())
+        if self.config.gemini_batch_mode:
+            results = self.run_batch(stock_codes, cached_codes)
+        else:
+            results = asyncio.run(self.run_async(stock_codes, cached_codes))
         
         if results and self.notifier.is_available():
             report = self.notifier.generate_dashboard_report(results)
             self.notifier.send(report)
         return results
 
-    def process_task(self, code):
-        success, _ = self.fetch_and_save_stock_data(code)
-        return self.analyze_stock(code) if success else None
+    async def run_async(self, stock_codes: List[str], cached_codes: Optional[set] = None) -> List[AnalysisResult]:
+        """
+        分阶段并发：拉取 → 分析，两阶段通过 asyncio.Queue 衔接
+
+        拉取阶段 max_workers 个 worker，阻塞的数据源 SDK（AkShare/yfinance）在线程池执行以保持低频访问，
+        入库与分析阶段的数据库/缓存读写使用另一个小线程池，不与拉取争抢线程；
+        分析阶段把就绪的标的攒成批（analysis_batch_size）一次请求 Gemini，同时在途的批数由
+        analysis_concurrency 限制。慢的 AI 请求不会占住拉取 worker，整体耗时趋近于较慢的那个阶段。
+        """
+        cached_codes = cached_codes or set()
+        loop = asyncio.get_running_loop()
+        fetch_queue: asyncio.Queue = asyncio.Queue()
+        write_queue: asyncio.Queue = asyncio.Queue()
+        analyze_queue: asyncio.Queue = asyncio.Queue()
+        for code in stock_codes:
+            fetch_queue.put_nowait(code)
+        results: List[AnalysisResult] = []
+
+        async def fetch_worker() -> None:
+            while not fetch_queue.empty():
+                code = fetch_queue.get_nowait()
+                if code in cached_codes:
+                    await analyze_queue.put(code)
+                    continue
+                if self._fetch_limiter is not None:
+                    await self._fetch_limiter.acquire()
+                df, source, error = await loop.run_in_executor(self._executor, self.fetch_stock_data, code)
+                if error is None:
+                    await write_queue.put((code, df, source))
+                else:
+                    logger.warning(f"[{code}] 数据获取失败: {error}")
+
+        async def writer() -> None:
+            # 组提交：每次取出队列中已就绪的全部数据，一个事务写入后再交给分析阶段
+            item = ()
+            while item is not None:
+                fetched = []
+                item = await write_queue.get()
+                while item is not None:
+                    fetched.append(item)
+                    if write_queue.empty():
+                        break
+                    item = write_queue.get_nowait()
+                if not fetched:
+                    continue
+                errors = await loop.run_in_executor(self._analyze_executor, self.save_fetched_data, fetched)
+                for code, error in errors.items():
+                    if error is None:
+                        await analyze_queue.put(code)
+                    else:
+                        logger.warning(f"[{code}] 数据保存失败: {error}")
+
+        # 至少允许一个批次在途，否则 ANALYSIS_CONCURRENCY=0 时所有批次都会永远等待
+        semaphore = asyncio.Semaphore(max(1, self.config.analysis_concurrency))
+
+        async def analyze_chunk(codes: List[str]) -> None:
+            async with semaphore:
+                # 一条查询读取整批标的的上下文及趋势分析所需的历史行情
+                try:
+                    contexts = await loop.run_in_executor(
+                        self._analyze_executor, self.db.get_analysis_context_bulk, codes, self.TREND_HISTORY_DAYS)
+                except Exception as e:
+                    # 批量读取失败时由各标的单独读取
+                    logger.error(f"批量读取分析上下文失败: {e}")
+                    contexts = {}
+                try:
+                    results.extend(await self.analyze_stocks(codes, contexts))
+                except Exception as e:
+                    # 单批异常只影响本批标的，其余批次与通知照常进行
+                    logger.error(f"[{', '.join(codes)}] 批量分析异常: {e}")
+
+        async def analyze_dispatcher() -> None:
+            # 攒批：拿到第一个标的后最多再等 BATCH_LINGER_SECONDS，或攒满 analysis_batch_size 个即提交
+            batch_size = max(1, self.config.analysis_batch_size)
+            tasks = []
+            code = ""
+            while code is not None:
+                codes = []
+                code = await analyze_queue.get()
+                deadline = loop.time() + self.BATCH_LINGER_SECONDS
+                while code is not None:
+                    codes.append(code)
+                    if len(codes) >= batch_size:
+                        break
+                    try:
+                        code = await asyncio.wait_for(analyze_queue.get(), max(0.0, deadline - loop.time()))
+                    except asyncio.TimeoutError:
+                        break
+                if codes:
+                    tasks.append(asyncio.create_task(analyze_chunk(codes)))
+            await asyncio.gather(*tasks)
+
+        fetch_workers = max(1, min(self.max_workers, len(stock_codes)))
+        # 限速在流水线层面统一控制：超出速率的请求在事件循环上排队，而不是让线程各自 sleep
+        if self.config.gemini_rpm > 0:
+            self._gemini_limiter = AsyncLimiter(self.config.gemini_rpm, 60)
+        if self.config.fetch_rpm > 0:
+            self._fetch_limiter = AsyncLimiter(self.config.fetch_rpm, 60)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor, \
+                ThreadPoolExecutor(max_workers=self.ANALYZE_WORKERS) as analyze_executor:
+            self._executor = executor
+            self._analyze_executor = analyze_executor
+            # 实时行情快照与拉取阶段并行，不阻塞拉取开始
+            equity_codes = [code for code in stock_codes if not self.is_crypto(code)]
+            if self.config.realtime_quote_enabled and equity_codes:
+                self._quote_task = loop.run_in_executor(executor, self.load_quote_snapshot, equity_codes)
+            try:
+                dispatcher = asyncio.create_task(analyze_dispatcher())
+                try:
+                    writer_task = asyncio.create_task(writer())
+                    try:
+                        await asyncio.gather(*[fetch_worker() for _ in range(fetch_workers)])
+                    finally:
+                        # 拉取结束后依次向写入、分析阶段发送结束标记
+                        write_queue.put_nowait(None)
+                    await writer_task
+                finally:
+                    analyze_queue.put_nowait(None)
+                await dispatcher
+            finally:
+                self._executor = self._analyze_executor = None
+                self._quote_task = None
+                self._gemini_limiter = self._fetch_limiter = None
+        return results
+
+    def run_batch(self, stock_codes: List[str], cached_codes: Optional[set] = None) -> List[AnalysisResult]:
+        """Batch 模式：先并发拉取数据，再按资产类型整体提交 Gemini Batch API"""
+        cached_codes = cached_codes or set()
+        fetch_codes = [code for code in stock_codes if code not in cached_codes]
+        equity_codes = [code for code in stock_codes if not self.is_crypto(code)]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            if self.config.realtime_quote_enabled and equity_codes:
+                executor.submit(self.load_quote_snapshot, equity_codes)
+            fetched = list(executor.map(self.fetch_stock_data, fetch_codes))
+        to_save = []
+        for code, (df, source, error) in zip(fetch_codes, fetched):
+            if error is None:
+                to_save.append((code, df, source))
+            else:
+                logger.warning(f"[{code}] 数据获取失败: {error}")
+        # 拉取阶段结束后一个事务写入全部日线
+        errors = self.save_fetched_data(to_save) if to_save else {}
+        ready_codes = [code for code in stock_codes if code in cached_codes or errors.get(code, "") is None]
+        try:
+            ready_contexts = self.db.get_analysis_context_bulk(ready_codes, self.TREND_HISTORY_DAYS)
+        except Exception as e:
+            # 批量读取失败时逐个读取
+            logger.error(f"批量读取分析上下文失败: {e}")
+            ready_contexts = {}
 
-def run_full_analysis(config: Config, args: argparse.Namespace, stock_codes: Optional[List[str]] = None):
-    pipeline = StockAnalysisPipeline(config=config)
+        results = []
+        for is_crypto_asset in (False, True):
+            contexts = []
+            for code in ready_codes:
+                if self.is_crypto(code) != is_crypto_asset: continue
+                try:
+                    context = self.get_analysis_context(code, ready_contexts.get(code))
+                except Exception as e:
+                    logger.error(f"[{code}] 分析上下文构建失败: {e}")
+                    continue
+                if context: contexts.append(context)
+            if not contexts: continue
+            extra_data = self.crypto_fetcher.get_onchain_sentiment() if is_crypto_asset else ""
+            # 命中当日缓存的直接返回，只把未命中的提交 Batch 任务
+            pending, cache_keys = [], {}
+            for context in contexts:
+                code = str(context.get('code'))
+                cache_key = self.analyzer.cache_key(context, extra_context=extra_data, is_crypto=is_crypto_asset)
+                try:
+                    cached = self.db.get_cached_result('analysis', cache_key, self._run_date)
+                except Exception as e:
+                    # 缓存不可用（如数据库被锁）时按未命中处理
+                    logger.warning(f"[{code}] 读取分析缓存失败: {e}")
+                    cached = None
+                if cached:
+                    logger.info(f"[{code}] 命中当日分析缓存")
+                    results.append(AnalysisResult.fast_parse(cached))
+                else:
+                    pending.append(context)
+                    cache_keys[code] = cache_key
+            if not pending: continue
+            batch_results = self.analyzer.submit_batch(pending, extra_context=extra_data, is_crypto=is_crypto_asset)
+            for code, result in batch_results.items():
+                results.append(result)
+                # 缓存写入失败不影响本次结果
+                try:
+                    self.db.save_cached_result('analysis', cache_keys[code], result.model_dump_json(),
+                                               code, self._run_date)
+                except Exception as e:
+                    logger.warning(f"[{code}] 写入分析缓存失败: {e}")
+        return results
+
+
+def run_full_analysis(pipeline: StockAnalysisPipeline, config: Config, args: argparse.Namespace,
+                      stock_codes: Optional[List[str]] = None):
     results = pipeline.run(stock_codes=stock_codes)
     
     # 尝试运行大盘复盘
     if config.market_review_enabled:
         try:
+            # 延迟导入：大盘复盘关闭时不加载 akshare
+            from market_analyzer import MarketAnalyzer
             ma = MarketAnalyzer(search_service=pipeline.search_service, analyzer=pipeline.analyzer)
             report = ma.run_daily_review()
             if report: pipeline.notifier.send(f"🎯 大盘复盘\n\n{report}")
@@ -137,8 +550,18 @@ def run_full_analysis(config: Config, args: argparse.Namespace, stock_codes: Opt
 def main():
     args = argparse.Namespace(stocks=None, debug=False, dry_run=False, no_notify=False, workers=3, schedule=False, no_market_review=False)
     config = get_config()
-    setup_logging(debug=args.debug)
-    run_full_analysis(config, args)
+    setup_logging(debug=args.debug, log_dir=config.log_dir)
+    # 定时模式下各次运行复用同一个 pipeline（数据源、HTTP 连接池、AI 模型只初始化一次）
+    pipeline = StockAnalysisPipeline(config=config, max_workers=args.workers)
+
+    if args.schedule or config.schedule_enabled:
+        from scheduler import run_with_schedule
+        run_with_schedule(
+            task=lambda: run_full_analysis(pipeline, config, args),
+            schedule_time=config.schedule_time,
+        )
+    else:
+        run_full_analysis(pipeline, config, args)
 
 if __name__ == "__main__":
     main()
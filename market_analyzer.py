@@ -16,7 +16,6 @@ from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Optional, Dict, Any, List
 
-import akshare as ak
 import pandas as pd
 
 from config import get_config
@@ -148,6 +147,8 @@ class MarketAnalyzer:
     
     def _get_main_indices(self) -> List[MarketIndex]:
         """获取主要指数实时行情"""
+        import akshare as ak
+        
         indices = []
         
         try:
@@ -193,6 +194,8 @@ class MarketAnalyzer:
     
     def _get_market_statistics(self, overview: MarketOverview):
         """获取市场涨跌统计"""
+        import akshare as ak
+        
         try:
             logger.info("[大盘] 获取市场涨跌统计...")
             
@@ -227,6 +230,8 @@ class MarketAnalyzer:
     
     def _get_sector_rankings(self, overview: MarketOverview):
         """获取板块涨跌榜"""
+        import akshare as ak
+        
         try:
             logger.info("[大盘] 获取板块涨跌榜...")
             
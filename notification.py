@@ -16,7 +16,6 @@ A股自选股智能分析系统 - 通知层
 """
 
 import logging
-import json
 import smtplib
 import re
 from datetime import datetime
@@ -29,7 +28,7 @@ from enum import Enum
 import requests
 
 from config import get_config
-from analyzer import AnalysisResult
+from analyzer import AnalysisResult, json_dumps
 
 logger = logging.getLogger(__name__)
 
@@ -111,13 +110,17 @@ class NotificationService:
     注意：所有已配置的渠道都会收到推送
     """
     
-    def __init__(self):
+    def __init__(self, session: Optional[requests.Session] = None):
         """
         初始化通知服务
         
         检测所有已配置的渠道，推送时会向所有渠道发送
+        
+        Args:
+            session: 共享的 HTTP 会话（可选），复用连接避免每次推送重新握手
         """
         config = get_config()
+        self._session = session or requests.Session()
         
         # 各渠道的 Webhook URL
         self._wechat_url = config.wechat_webhook_url
@@ -1232,7 +1235,7 @@ class NotificationService:
             }
         }
         
-        response = requests.post(
+        response = self._session.post(
             self._wechat_url,
             json=payload,
             timeout=10
@@ -1446,7 +1449,7 @@ class NotificationService:
             logger.debug(f"飞书请求 URL: {self._feishu_url}")
             logger.debug(f"飞书请求 payload 长度: {len(content)} 字符")
 
-            response = requests.post(
+            response = self._session.post(
                 self._feishu_url,
                 json=payload,
                 timeout=30
@@ -1772,7 +1775,7 @@ class NotificationService:
             "disable_web_page_preview": True
         }
         
-        response = requests.post(api_url, json=payload, timeout=10)
+        response = self._session.post(api_url, json=payload, timeout=10)
         
         if response.status_code == 200:
             result = response.json()
@@ -1790,7 +1793,7 @@ class NotificationService:
                     payload['text'] = text  # 使用原始文本
                     del payload['parse_mode']
                     
-                    response = requests.post(api_url, json=payload, timeout=10)
+                    response = self._session.post(api_url, json=payload, timeout=10)
                     if response.status_code == 200 and response.json().get('ok'):
                         logger.info("Telegram 消息发送成功（纯文本）")
                         return True
@@ -1981,7 +1984,7 @@ class NotificationService:
                 "priority": priority,
             }
             
-            response = requests.post(api_url, data=payload, timeout=30)
+            response = self._session.post(api_url, data=payload, timeout=30)
             
             if response.status_code == 200:
                 result = response.json()
@@ -2142,8 +2145,8 @@ class NotificationService:
         # 支持 Bearer Token 认证（#51）
         if self._custom_webhook_bearer_token:
             headers['Authorization'] = f'Bearer {self._custom_webhook_bearer_token}'
-        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
-        response = requests.post(url, data=body, headers=headers, timeout=timeout)
+        body = json_dumps(payload).encode('utf-8')
+        response = self._session.post(url, data=body, headers=headers, timeout=timeout)
         if response.status_code == 200:
             return True
         logger.error(f"自定义 Webhook 推送失败: HTTP {response.status_code}")
@@ -2238,7 +2241,7 @@ class NotificationService:
             }
 
             # 如果仍超限（极端情况下），再按字节硬截断一次
-            body_bytes = len(json.dumps(payload, ensure_ascii=False).encode('utf-8'))
+            body_bytes = len(json_dumps(payload).encode('utf-8'))
             if body_bytes > max_bytes:
                 hard_budget = max(200, budget - (body_bytes - max_bytes) - 200)
                 payload["markdown"]["text"] = self._truncate_to_bytes(payload["markdown"]["text"], hard_budget)
@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+numba 可选依赖兼容层
+===================================
+
+安装 numba 时导出其 njit，将数值计算内核编译为本地代码；
+未安装时 njit 为空装饰器，被装饰的函数按原样以 Python 执行。
+
+使用方式：
+    from numba_compat import HAS_NUMBA, njit
+
+    @njit(cache=True)
+    def _kernel(values): ...
+"""
+
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+    def njit(*args, **kwargs):
+        """numba 缺失时的空装饰器，兼容 @njit 与 @njit(...) 两种写法"""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+__all__ = ['HAS_NUMBA', 'njit']
@@ -11,11 +11,12 @@ A股自选股智能分析系统 - 搜索服务模块
 4. 搜索结果缓存和格式化
 """
 
+import json
 import logging
 import random
 import time
 from abc import ABC, abstractmethod
-from dataclasses import dataclass, field
+from dataclasses import asdict, dataclass, field
 from datetime import datetime
 from typing import List, Dict, Any, Optional
 from itertools import cycle
@@ -48,6 +49,13 @@ class SearchResponse:
     error_message: Optional[str] = None
     search_time: float = 0.0  # 搜索耗时（秒）
     
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'SearchResponse':
+        """从 asdict() 的结果还原（用于持久化缓存）"""
+        data = dict(data)
+        data['results'] = [SearchResult(**r) for r in data.get('results', [])]
+        return cls(**data)
+    
     def to_context(self, max_results: int = 5) -> str:
         """将搜索结果转换为可用于 AI 分析的上下文"""
         if not self.success or not self.results:
@@ -357,8 +365,9 @@ class BochaSearchProvider(BaseSearchProvider):
     文档：https://bocha-ai.feishu.cn/wiki/RXEOw02rFiwzGSkd9mUcqoeAnNK
     """
     
-    def __init__(self, api_keys: List[str]):
+    def __init__(self, api_keys: List[str], session=None):
         super().__init__(api_keys, "Bocha")
+        self._session = session
     
     def _do_search(self, query: str, api_key: str, max_results: int) -> SearchResponse:
         """执行博查搜索"""
@@ -392,7 +401,8 @@ class BochaSearchProvider(BaseSearchProvider):
             }
             
             # 执行搜索
-            response = requests.post(url, headers=headers, json=payload, timeout=10)
+            http = self._session or requests
+            response = http.post(url, headers=headers, json=payload, timeout=10)
             
             # 检查HTTP状态码
             if response.status_code != 200:
@@ -545,6 +555,8 @@ class SearchService:
         bocha_keys: Optional[List[str]] = None,
         tavily_keys: Optional[List[str]] = None,
         serpapi_keys: Optional[List[str]] = None,
+        session=None,
+        db=None,
     ):
         """
         初始化搜索服务
@@ -553,13 +565,16 @@ class SearchService:
             bocha_keys: 博查搜索 API Key 列表
             tavily_keys: Tavily API Key 列表
             serpapi_keys: SerpAPI Key 列表
+            session: 共享的 requests.Session（可选，供博查 HTTP 请求复用连接）
+            db: DatabaseManager（可选），用于按日持久化缓存情报搜索结果
         """
+        self._db = db
         self._providers: List[BaseSearchProvider] = []
         
         # 初始化搜索引擎（按优先级排序）
         # 1. Bocha 优先（中文搜索优化，AI摘要）
         if bocha_keys:
-            self._providers.append(BochaSearchProvider(bocha_keys))
+            self._providers.append(BochaSearchProvider(bocha_keys, session=session))
             logger.info(f"已配置 Bocha 搜索，共 {len(bocha_keys)} 个 API Key")
         
         # 2. Tavily（免费额度更多，每月 1000 次）
@@ -705,6 +720,13 @@ class SearchService:
         Returns:
             {维度名称: SearchResponse} 字典
         """
+        cache_key = f"{stock_code}:{max_searches}"
+        if self._db is not None:
+            cached = self._db.get_cached_result('search', cache_key)
+            if cached:
+                logger.info(f"[情报搜索] {stock_code} 命中当日缓存")
+                return {name: SearchResponse.from_dict(resp) for name, resp in json.loads(cached).items()}
+        
         results = {}
         search_count = 0
         
@@ -758,6 +780,14 @@ class SearchService:
             # 短暂延迟避免请求过快
             time.sleep(0.5)
         
+        # 仅缓存全部成功的结果，失败的维度下次重新搜索
+        if self._db is not None and results and all(r.success for r in results.values()):
+            self._db.save_cached_result(
+                'search', cache_key,
+                json.dumps({name: asdict(resp) for name, resp in results.items()}, ensure_ascii=False),
+                code=stock_code,
+            )
+        
         return results
     
     def format_intel_report(self, intel_results: Dict[str, SearchResponse], stock_name: str) -> str:
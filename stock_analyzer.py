@@ -24,9 +24,70 @@ from enum import Enum
 import pandas as pd
 import numpy as np
 
+# 可选依赖：安装 numba 时将均线/量能统计编译为本地代码，未安装时按原样以 Python 执行
+from numba_compat import njit
+
 logger = logging.getLogger(__name__)
 
 
+# _trend_kernel 输出数组的下标
+_MA5, _MA10, _MA20, _MA60, _PREV_MA5, _PREV_MA20, _VOL_5D_AVG, _PREV_CLOSE, _RECENT_HIGH = range(9)
+_TREND_STATS_LEN = 9
+
+
+@njit(cache=True)
+def _window_mean(values: np.ndarray, end: int, window: int) -> float:
+    """values[end-window+1:end+1] 的均值；窗口不足或含 NaN 时为 NaN（与 rolling(window).mean() 一致）"""
+    if end < window - 1:
+        return np.nan
+    total = 0.0
+    for i in range(end - window + 1, end + 1):
+        total += values[i]
+    return total / window
+
+
+@njit(cache=True)
+def _trend_kernel(close: np.ndarray, high: np.ndarray, volume: np.ndarray) -> np.ndarray:
+    """
+    一次遍历计算趋势分析所需的全部数值（输入按日期升序）
+    
+    Returns:
+        长度为 _TREND_STATS_LEN 的 float64 数组，按 _MA5 等下标取值
+    """
+    n = close.shape[0]
+    last = n - 1
+    prev = n - 5 if n >= 5 else last
+    out = np.full(_TREND_STATS_LEN, np.nan)
+    
+    out[_MA5] = _window_mean(close, last, 5)
+    out[_MA10] = _window_mean(close, last, 10)
+    out[_MA20] = _window_mean(close, last, 20)
+    # 数据不足 60 日时使用 MA20 替代
+    out[_MA60] = _window_mean(close, last, 60) if n >= 60 else out[_MA20]
+    out[_PREV_MA5] = _window_mean(close, prev, 5)
+    out[_PREV_MA20] = _window_mean(close, prev, 20)
+    
+    # 前 5 日均量（不含当日，跳过缺失值）
+    total = 0.0
+    count = 0
+    for i in range(max(n - 6, 0), last):
+        if not np.isnan(volume[i]):
+            total += volume[i]
+            count += 1
+    if count > 0:
+        out[_VOL_5D_AVG] = total / count
+    
+    if n >= 2:
+        out[_PREV_CLOSE] = close[n - 2]
+    
+    # 近 20 日最高价（跳过缺失值）
+    for i in range(max(n - 20, 0), n):
+        if not np.isnan(high[i]) and (np.isnan(out[_RECENT_HIGH]) or high[i] > out[_RECENT_HIGH]):
+            out[_RECENT_HIGH] = high[i]
+    
+    return out
+
+
 class TrendStatus(Enum):
     """趋势状态枚举"""
     STRONG_BULL = "强势多头"      # MA5 > MA10 > MA20，且间距扩大
@@ -151,60 +212,75 @@ class StockTrendAnalyzer:
             df: 包含 OHLCV 数据的 DataFrame
             code: 股票代码
             
+        Returns:
+            TrendAnalysisResult 分析结果
+        """
+        if df is None or df.empty:
+            return self.analyze_arrays(np.empty(0), np.empty(0), np.empty(0), code)
+        
+        # 确保数据按日期排序，取出连续的 float64 数组交给数值内核
+        df = df.sort_values('date')
+        return self.analyze_arrays(
+            df['close'].to_numpy(dtype=np.float64),
+            df['high'].to_numpy(dtype=np.float64),
+            df['volume'].to_numpy(dtype=np.float64),
+            code,
+        )
+    
+    def analyze_arrays(
+        self,
+        close: np.ndarray,
+        high: np.ndarray,
+        volume: np.ndarray,
+        code: str
+    ) -> TrendAnalysisResult:
+        """
+        基于按日期升序的 float64 数组分析股票趋势（不经过 DataFrame）
+        
+        Args:
+            close: 收盘价
+            high: 最高价
+            volume: 成交量
+            code: 股票代码
+            
         Returns:
             TrendAnalysisResult 分析结果
         """
         result = TrendAnalysisResult(code=code)
         
-        if df is None or df.empty or len(df) < 20:
+        if len(close) < 20:
             logger.warning(f"{code} 数据不足，无法进行趋势分析")
             result.risk_factors.append("数据不足，无法完成分析")
             return result
         
-        # 确保数据按日期排序
-        df = df.sort_values('date').reset_index(drop=True)
-        
-        # 计算均线
-        df = self._calculate_mas(df)
+        # 计算均线及量能、高点等统计
+        stats = _trend_kernel(close, high, volume)
         
         # 获取最新数据
-        latest = df.iloc[-1]
-        result.current_price = float(latest['close'])
-        result.ma5 = float(latest['MA5'])
-        result.ma10 = float(latest['MA10'])
-        result.ma20 = float(latest['MA20'])
-        result.ma60 = float(latest.get('MA60', 0))
+        result.current_price = float(close[-1])
+        result.ma5 = float(stats[_MA5])
+        result.ma10 = float(stats[_MA10])
+        result.ma20 = float(stats[_MA20])
+        result.ma60 = float(stats[_MA60])
         
         # 1. 趋势判断
-        self._analyze_trend(df, result)
+        self._analyze_trend(stats, result)
         
         # 2. 乖离率计算
         self._calculate_bias(result)
         
         # 3. 量能分析
-        self._analyze_volume(df, result)
+        self._analyze_volume(float(volume[-1]), stats, result)
         
         # 4. 支撑压力分析
-        self._analyze_support_resistance(df, result)
+        self._analyze_support_resistance(stats, result)
         
         # 5. 生成买入信号
         self._generate_signal(result)
         
         return result
     
-    def _calculate_mas(self, df: pd.DataFrame) -> pd.DataFrame:
-        """计算均线"""
-        df = df.copy()
-        df['MA5'] = df['close'].rolling(window=5).mean()
-        df['MA10'] = df['close'].rolling(window=10).mean()
-        df['MA20'] = df['close'].rolling(window=20).mean()
-        if len(df) >= 60:
-            df['MA60'] = df['close'].rolling(window=60).mean()
-        else:
-            df['MA60'] = df['MA20']  # 数据不足时使用 MA20 替代
-        return df
-    
-    def _analyze_trend(self, df: pd.DataFrame, result: TrendAnalysisResult) -> None:
+    def _analyze_trend(self, stats: np.ndarray, result: TrendAnalysisResult) -> None:
         """
         分析趋势状态
         
@@ -215,8 +291,8 @@ class StockTrendAnalyzer:
         # 判断均线排列
         if ma5 > ma10 > ma20:
             # 检查间距是否在扩大（强势）
-            prev = df.iloc[-5] if len(df) >= 5 else df.iloc[-1]
-            prev_spread = (prev['MA5'] - prev['MA20']) / prev['MA20'] * 100 if prev['MA20'] > 0 else 0
+            prev_ma5, prev_ma20 = stats[_PREV_MA5], stats[_PREV_MA20]
+            prev_spread = (prev_ma5 - prev_ma20) / prev_ma20 * 100 if prev_ma20 > 0 else 0
             curr_spread = (ma5 - ma20) / ma20 * 100 if ma20 > 0 else 0
             
             if curr_spread > prev_spread and curr_spread > 5:
@@ -234,8 +310,8 @@ class StockTrendAnalyzer:
             result.trend_strength = 55
             
         elif ma5 < ma10 < ma20:
-            prev = df.iloc[-5] if len(df) >= 5 else df.iloc[-1]
-            prev_spread = (prev['MA20'] - prev['MA5']) / prev['MA5'] * 100 if prev['MA5'] > 0 else 0
+            prev_ma5, prev_ma20 = stats[_PREV_MA5], stats[_PREV_MA20]
+            prev_spread = (prev_ma20 - prev_ma5) / prev_ma5 * 100 if prev_ma5 > 0 else 0
             curr_spread = (ma20 - ma5) / ma5 * 100 if ma5 > 0 else 0
             
             if curr_spread > prev_spread and curr_spread > 5:
@@ -274,24 +350,20 @@ class StockTrendAnalyzer:
         if result.ma20 > 0:
             result.bias_ma20 = (price - result.ma20) / result.ma20 * 100
     
-    def _analyze_volume(self, df: pd.DataFrame, result: TrendAnalysisResult) -> None:
+    def _analyze_volume(self, latest_volume: float, stats: np.ndarray, result: TrendAnalysisResult) -> None:
         """
         分析量能
         
         偏好：缩量回调 > 放量上涨 > 缩量上涨 > 放量下跌
         """
-        if len(df) < 5:
-            return
-        
-        latest = df.iloc[-1]
-        vol_5d_avg = df['volume'].iloc[-6:-1].mean()
+        vol_5d_avg = stats[_VOL_5D_AVG]
         
         if vol_5d_avg > 0:
-            result.volume_ratio_5d = float(latest['volume']) / vol_5d_avg
+            result.volume_ratio_5d = latest_volume / float(vol_5d_avg)
         
         # 判断价格变化
-        prev_close = df.iloc[-2]['close']
-        price_change = (latest['close'] - prev_close) / prev_close * 100
+        prev_close = stats[_PREV_CLOSE]
+        price_change = (result.current_price - prev_close) / prev_close * 100
         
         # 量能状态判断
         if result.volume_ratio_5d >= self.VOLUME_HEAVY_RATIO:
@@ -312,7 +384,7 @@ class StockTrendAnalyzer:
             result.volume_status = VolumeStatus.NORMAL
             result.volume_trend = "量能正常"
     
-    def _analyze_support_resistance(self, df: pd.DataFrame, result: TrendAnalysisResult) -> None:
+    def _analyze_support_resistance(self, stats: np.ndarray, result: TrendAnalysisResult) -> None:
         """
         分析支撑压力位
         
@@ -340,10 +412,9 @@ class StockTrendAnalyzer:
             result.support_levels.append(result.ma20)
         
         # 近期高点作为压力
-        if len(df) >= 20:
-            recent_high = df['high'].iloc[-20:].max()
-            if recent_high > price:
-                result.resistance_levels.append(recent_high)
+        recent_high = float(stats[_RECENT_HIGH])
+        if recent_high > price:
+            result.resistance_levels.append(recent_high)
     
     def _generate_signal(self, result: TrendAnalysisResult) -> None:
         """
@@ -13,25 +13,32 @@ A股自选股智能分析系统 - 存储层
 
 import logging
 from datetime import datetime, date, timedelta
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Set, Tuple
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 from sqlalchemy import (
     create_engine,
+    event,
     Column,
     String,
     Float,
     Date,
     DateTime,
     Integer,
+    Text,
     Index,
     UniqueConstraint,
     select,
     and_,
     desc,
+    func,
+    insert,
+    update,
 )
 from sqlalchemy.orm import (
+    aliased,
     declarative_base,
     sessionmaker,
     Session,
@@ -46,6 +53,24 @@ logger = logging.getLogger(__name__)
 Base = declarative_base()
 
 
+# SQLite 连接参数：WAL 日志合并写入、降低 fsync 频率、内存映射读取
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA mmap_size=268435456",
+)
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    """每个新建的 SQLite 连接上执行 SQLITE_PRAGMAS"""
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in SQLITE_PRAGMAS:
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
+
+
 # === 数据模型定义 ===
 
 class StockDaily(Base):
@@ -119,6 +144,49 @@ class StockDaily(Base):
         }
 
 
+# 日线 DataFrame 中写入 StockDaily 的行情/指标列（缺失的列按空值写入）
+_DAILY_COLUMNS = (
+    'open', 'high', 'low', 'close', 'volume', 'amount', 'pct_chg',
+    'ma5', 'ma10', 'ma20', 'volume_ratio',
+)
+
+
+class ResultCache(Base):
+    """
+    耗时调用结果的持久化缓存
+    
+    存储 AI 分析、情报搜索等高成本调用的结果（JSON 文本），
+    按 (类型, 键, 日期) 唯一，同日重跑（定时任务、重试）直接读取
+    """
+    __tablename__ = 'result_cache'
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    
+    # 缓存类型（如 analysis, search）
+    kind = Column(String(20), nullable=False)
+    
+    # 缓存键（输入的稳定哈希或业务键）
+    cache_key = Column(String(64), nullable=False)
+    
+    # 缓存所属日期（跨日自动失效）
+    cache_date = Column(Date, nullable=False, index=True)
+    
+    # 关联代码（便于排查）
+    code = Column(String(20))
+    
+    # 结果 JSON
+    payload = Column(Text, nullable=False)
+    
+    created_at = Column(DateTime, default=datetime.now)
+    
+    __table_args__ = (
+        UniqueConstraint('kind', 'cache_key', 'cache_date', name='uix_kind_key_date'),
+    )
+    
+    def __repr__(self):
+        return f"<ResultCache(kind={self.kind}, code={self.code}, date={self.cache_date})>"
+
+
 class DatabaseManager:
     """
     数据库管理器 - 单例模式
@@ -158,6 +226,8 @@ class DatabaseManager:
             echo=False,  # 设为 True 可查看 SQL 语句
             pool_pre_ping=True,  # 连接健康检查
         )
+        if self._engine.dialect.name == 'sqlite':
+            event.listen(self._engine, 'connect', _set_sqlite_pragmas)
         
         # 创建 Session 工厂
         self._SessionLocal = sessionmaker(
@@ -230,6 +300,40 @@ class DatabaseManager:
             
             return result is not None
     
+    def has_today_data_bulk(
+        self,
+        codes: List[str],
+        target_date: Optional[date] = None
+    ) -> Set[str]:
+        """
+        批量检查哪些代码已有指定日期的数据
+        
+        一条 IN 查询替代逐个代码调用 has_today_data
+        
+        Args:
+            codes: 股票代码列表
+            target_date: 目标日期（默认今天）
+            
+        Returns:
+            已有数据的代码集合
+        """
+        if not codes:
+            return set()
+        if target_date is None:
+            target_date = date.today()
+        
+        with self.get_session() as session:
+            results = session.execute(
+                select(StockDaily.code).where(
+                    and_(
+                        StockDaily.code.in_(set(codes)),
+                        StockDaily.date == target_date
+                    )
+                )
+            ).scalars().all()
+            
+            return set(results)
+    
     def get_latest_data(
         self, 
         code: str, 
@@ -314,75 +418,77 @@ class DatabaseManager:
             logger.warning(f"保存数据为空，跳过 {code}")
             return 0
         
-        saved_count = 0
+        return self.save_daily_data_bulk([(code, df, data_source)])
+    
+    def save_daily_data_bulk(
+        self,
+        items: List[Tuple[str, pd.DataFrame, str]]
+    ) -> int:
+        """
+        在一个事务中批量保存多只股票的日线数据
+        
+        策略：
+        - 一条查询找出已存在的 (代码, 日期)，已存在的批量更新，其余批量插入（executemany）
+        - 整批只提交一次，替代逐行查询 + 逐个代码提交
         
+        Args:
+            items: [(股票代码, 日线 DataFrame, 数据来源), ...]
+            
+        Returns:
+            新增的记录数
+        """
+        now = datetime.now()
+        rows: List[Dict[str, Any]] = []
+        for code, df, data_source in items:
+            if df is None or df.empty:
+                continue
+            frame = df.reindex(columns=['date', *_DAILY_COLUMNS])
+            frame['date'] = pd.to_datetime(frame['date']).dt.date
+            frame = frame.drop_duplicates(subset='date', keep='last')
+            for record in frame.to_dict('records'):
+                record['code'] = code
+                record['data_source'] = data_source
+                record['updated_at'] = now
+                rows.append(record)
+        if not rows:
+            return 0
+        
+        codes = {row['code'] for row in rows}
+        label = next(iter(codes)) if len(codes) == 1 else f"{len(codes)} 只股票"
+        min_date = min(row['date'] for row in rows)
         with self.get_session() as session:
             try:
-                for _, row in df.iterrows():
-                    # 解析日期
-                    row_date = row.get('date')
-                    if isinstance(row_date, str):
-                        row_date = datetime.strptime(row_date, '%Y-%m-%d').date()
-                    elif isinstance(row_date, datetime):
-                        row_date = row_date.date()
-                    elif isinstance(row_date, pd.Timestamp):
-                        row_date = row_date.date()
-                    
-                    # 检查是否已存在
-                    existing = session.execute(
-                        select(StockDaily).where(
+                existing = {
+                    (code, row_date): row_id
+                    for row_id, code, row_date in session.execute(
+                        select(StockDaily.id, StockDaily.code, StockDaily.date).where(
                             and_(
-                                StockDaily.code == code,
-                                StockDaily.date == row_date
+                                StockDaily.code.in_(codes),
+                                StockDaily.date >= min_date
                             )
                         )
-                    ).scalar_one_or_none()
-                    
-                    if existing:
-                        # 更新现有记录
-                        existing.open = row.get('open')
-                        existing.high = row.get('high')
-                        existing.low = row.get('low')
-                        existing.close = row.get('close')
-                        existing.volume = row.get('volume')
-                        existing.amount = row.get('amount')
-                        existing.pct_chg = row.get('pct_chg')
-                        existing.ma5 = row.get('ma5')
-                        existing.ma10 = row.get('ma10')
-                        existing.ma20 = row.get('ma20')
-                        existing.volume_ratio = row.get('volume_ratio')
-                        existing.data_source = data_source
-                        existing.updated_at = datetime.now()
+                    )
+                }
+                updates, inserts = [], []
+                for row in rows:
+                    row_id = existing.get((row['code'], row['date']))
+                    if row_id is None:
+                        inserts.append(row)
                     else:
-                        # 创建新记录
-                        record = StockDaily(
-                            code=code,
-                            date=row_date,
-                            open=row.get('open'),
-                            high=row.get('high'),
-                            low=row.get('low'),
-                            close=row.get('close'),
-                            volume=row.get('volume'),
-                            amount=row.get('amount'),
-                            pct_chg=row.get('pct_chg'),
-                            ma5=row.get('ma5'),
-                            ma10=row.get('ma10'),
-                            ma20=row.get('ma20'),
-                            volume_ratio=row.get('volume_ratio'),
-                            data_source=data_source,
-                        )
-                        session.add(record)
-                        saved_count += 1
-                
+                        updates.append({'id': row_id, **row})
+                if updates:
+                    session.execute(update(StockDaily), updates)
+                if inserts:
+                    session.execute(insert(StockDaily), inserts)
                 session.commit()
-                logger.info(f"保存 {code} 数据成功，新增 {saved_count} 条")
+                logger.info(f"保存 {label} 数据成功，新增 {len(inserts)} 条")
                 
             except Exception as e:
                 session.rollback()
-                logger.error(f"保存 {code} 数据失败: {e}")
+                logger.error(f"保存 {label} 数据失败: {e}")
                 raise
         
-        return saved_count
+        return len(inserts)
     
     def get_analysis_context(
         self, 
@@ -411,6 +517,80 @@ class DatabaseManager:
             logger.warning(f"未找到 {code} 的数据")
             return None
         
+        return self._build_analysis_context(code, recent_data)
+    
+    def get_analysis_context_bulk(
+        self,
+        codes: List[str],
+        history_days: int = 0,
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        批量获取分析上下文
+        
+        用一条窗口函数查询取出每个代码最近2天的数据，
+        替代逐个代码调用 get_analysis_context
+        
+        Args:
+            codes: 股票代码列表
+            history_days: 大于 0 时同一查询多取最近 N 天行情，以 float64 列数组（按日期升序）
+                放在上下文的 'history' 键中，供趋势分析使用
+            
+        Returns:
+            {代码: 上下文字典}，无数据或数据异常的代码不包含在内
+        """
+        if not codes:
+            return {}
+        
+        row_num = func.row_number().over(
+            partition_by=StockDaily.code,
+            order_by=desc(StockDaily.date),
+        ).label('row_num')
+        ranked = (
+            select(StockDaily, row_num)
+            .where(StockDaily.code.in_(set(codes)))
+            .subquery()
+        )
+        latest = aliased(StockDaily, ranked)
+        
+        recent_by_code: Dict[str, List[StockDaily]] = {}
+        with self.get_session() as session:
+            results = session.execute(
+                select(latest)
+                .where(ranked.c.row_num <= max(2, history_days))
+                .order_by(latest.code, desc(latest.date))
+            ).scalars().all()
+            for record in results:
+                recent_by_code.setdefault(record.code, []).append(record)
+        
+        contexts: Dict[str, Dict[str, Any]] = {}
+        for code, recent_data in recent_by_code.items():
+            # 单个代码数据异常（如收盘价为空）只跳过该代码，不影响整批
+            try:
+                context = self._build_analysis_context(code, recent_data[:2])
+                if history_days > 0:
+                    context['history'] = self._history_arrays(recent_data[:history_days])
+                contexts[code] = context
+            except Exception as e:
+                logger.error(f"构建 {code} 分析上下文失败: {e}")
+        return contexts
+    
+    @staticmethod
+    def _history_arrays(recent_data: List[StockDaily]) -> Dict[str, np.ndarray]:
+        """将按日期降序的记录转为按日期升序的列数组，空值为 NaN"""
+        rows = recent_data[::-1]
+        arrays = {
+            col: np.array([getattr(row, col) for row in rows], dtype=np.float64)
+            for col in ('open', 'high', 'low', 'close', 'volume')
+        }
+        arrays['date'] = np.array([row.date for row in rows], dtype='datetime64[D]')
+        return arrays
+    
+    def _build_analysis_context(
+        self,
+        code: str,
+        recent_data: List[StockDaily]
+    ) -> Dict[str, Any]:
+        """根据最近数据（按日期降序）组装分析上下文"""
         today_data = recent_data[0]
         yesterday_data = recent_data[1] if len(recent_data) > 1 else None
         
@@ -439,6 +619,86 @@ class DatabaseManager:
         
         return context
     
+    def get_cached_result(
+        self,
+        kind: str,
+        cache_key: str,
+        target_date: Optional[date] = None
+    ) -> Optional[str]:
+        """
+        读取持久化缓存
+        
+        Args:
+            kind: 缓存类型
+            cache_key: 缓存键
+            target_date: 缓存日期（默认今天）
+            
+        Returns:
+            缓存的 JSON 文本，未命中返回 None
+        """
+        if target_date is None:
+            target_date = date.today()
+        
+        with self.get_session() as session:
+            return session.execute(
+                select(ResultCache.payload).where(
+                    and_(
+                        ResultCache.kind == kind,
+                        ResultCache.cache_key == cache_key,
+                        ResultCache.cache_date == target_date
+                    )
+                )
+            ).scalar_one_or_none()
+    
+    def save_cached_result(
+        self,
+        kind: str,
+        cache_key: str,
+        payload: str,
+        code: Optional[str] = None,
+        target_date: Optional[date] = None
+    ) -> None:
+        """
+        写入持久化缓存（存在则覆盖）
+        
+        Args:
+            kind: 缓存类型
+            cache_key: 缓存键
+            payload: 结果 JSON 文本
+            code: 关联代码
+            target_date: 缓存日期（默认今天）
+        """
+        if target_date is None:
+            target_date = date.today()
+        
+        with self.get_session() as session:
+            try:
+                existing = session.execute(
+                    select(ResultCache).where(
+                        and_(
+                            ResultCache.kind == kind,
+                            ResultCache.cache_key == cache_key,
+                            ResultCache.cache_date == target_date
+                        )
+                    )
+                ).scalar_one_or_none()
+                
+                if existing:
+                    existing.payload = payload
+                    existing.created_at = datetime.now()
+                else:
+                    session.add(ResultCache(
+                        kind=kind,
+                        cache_key=cache_key,
+                        cache_date=target_date,
+                        code=code,
+                        payload=payload,
+                    ))
+                session.commit()
+            except IntegrityError:
+                # 并发写入同一键：另一线程已写入，直接忽略
+                session.rollback()
+    
     def _analyze_ma_status(self, data: StockDaily) -> str:
         """
         分析均线形态
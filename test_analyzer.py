@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+A股自选股智能分析系统 - AI 分析层单元测试
+===================================
+
+使用方法：
+    pytest test_analyzer.py
+"""
+import json
+
+from analyzer import GeminiAnalyzer
+
+CODES = ['600519', '000001', '000002']
+
+
+def _item(code=None, **overrides):
+    item = {
+        'name': '测试',
+        'operation_advice': '观望',
+        'sentiment_score': 50,
+        'trend_prediction': '震荡',
+        'risk_level': '中',
+        'analysis_points': ['要点'],
+        'technical_indicators': {'MA5': '10.0'},
+        'summary': '总结',
+        **overrides,
+    }
+    if code is not None:
+        item['code'] = code
+    return item
+
+
+def _parse(items, codes=CODES):
+    return GeminiAnalyzer._parse_batch_response(json.dumps(items, ensure_ascii=False), codes)
+
+
+def test_parse_batch_out_of_order():
+    results = _parse([_item('000002'), _item('600519'), _item('000001')])
+    assert [result.code for result in results] == CODES
+
+
+def test_parse_batch_missing_item():
+    # 漏掉的标的保持 None，其余不错位
+    results = _parse([_item('600519'), _item('000002')])
+    assert results[0].code == '600519'
+    assert results[1] is None
+    assert results[2].code == '000002'
+
+
+def test_parse_batch_unknown_and_duplicate_codes():
+    results = _parse([
+        _item('600519', summary='第一次'),
+        _item('999999'),                    # 不在本批中
+        _item('600519', summary='第二次'),  # 重复
+    ])
+    assert results[0].summary == '第一次'
+    assert results[1] is None
+    assert results[2] is None
+
+
+def test_parse_batch_without_code_field_falls_back_to_position():
+    results = _parse([_item(), _item('000001'), _item()])
+    assert [result.code for result in results] == CODES
+
+
+def test_parse_batch_invalid_items():
+    # 非对象项与校验失败的项丢弃，对应标的由调用方重试
+    results = _parse(['oops', _item('000001', sentiment_score='高'), _item('000002')])
+    assert results[0] is None
+    assert results[1] is None
+    assert results[2].code == '000002'
+
+
+def test_parse_batch_not_array():
+    assert _parse(_item('600519')) == [None, None, None]
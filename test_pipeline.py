@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+A股自选股智能分析系统 - 流水线单元测试
+===================================
+
+使用方法：
+    pytest test_pipeline.py
+"""
+import pytest
+
+from main import StockAnalysisPipeline
+
+
+@pytest.fixture
+def pipeline():
+    # 只测试代码分类，不初始化数据库、数据源与 AI 模型
+    instance = StockAnalysisPipeline.__new__(StockAnalysisPipeline)
+    instance._code_info = {}
+    return instance
+
+
+@pytest.mark.parametrize("code, expected", [
+    ("600519", False),   # A股：纯数字
+    ("000001", False),
+    ("BTC-USD", True),   # 加密货币交易对
+    ("ETH-USD", True),
+    ("00700.HK", True),  # 带后缀的港股代码含字母，与原 any(c.isalpha()) 判断一致
+])
+def test_is_crypto(pipeline, code, expected):
+    assert pipeline.is_crypto(code) is expected
+    # 与原实现保持一致
+    assert pipeline.is_crypto(code) == any(c.isalpha() for c in code)
+
+
+def test_code_info_caches_name(pipeline):
+    is_crypto, name = pipeline.code_info("600519")
+    assert is_crypto is False
+    assert name  # 未配置名称时回退为代码本身
+    assert pipeline._code_info["600519"] == (is_crypto, name)
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+A股自选股智能分析系统 - 趋势分析单元测试
+===================================
+
+使用方法：
+    pytest test_stock_analyzer.py
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from stock_analyzer import (
+    StockTrendAnalyzer, TrendAnalysisResult, TrendStatus, VolumeStatus,
+)
+
+
+def _pandas_reference(analyzer: StockTrendAnalyzer, df: pd.DataFrame, code: str) -> TrendAnalysisResult:
+    """改为数组计算之前基于 DataFrame 的实现（rolling 均线、iloc 取值），作为对照"""
+    result = TrendAnalysisResult(code=code)
+    df = df.sort_values('date').reset_index(drop=True)
+    df['MA5'] = df['close'].rolling(window=5).mean()
+    df['MA10'] = df['close'].rolling(window=10).mean()
+    df['MA20'] = df['close'].rolling(window=20).mean()
+    df['MA60'] = df['close'].rolling(window=60).mean() if len(df) >= 60 else df['MA20']
+
+    latest = df.iloc[-1]
+    result.current_price = float(latest['close'])
+    result.ma5 = float(latest['MA5'])
+    result.ma10 = float(latest['MA10'])
+    result.ma20 = float(latest['MA20'])
+    result.ma60 = float(latest['MA60'])
+
+    # 趋势判断
+    ma5, ma10, ma20 = result.ma5, result.ma10, result.ma20
+    prev = df.iloc[-5]
+    if ma5 > ma10 > ma20:
+        prev_spread = (prev['MA5'] - prev['MA20']) / prev['MA20'] * 100 if prev['MA20'] > 0 else 0
+        curr_spread = (ma5 - ma20) / ma20 * 100 if ma20 > 0 else 0
+        if curr_spread > prev_spread and curr_spread > 5:
+            result.trend_status, result.ma_alignment, result.trend_strength = (
+                TrendStatus.STRONG_BULL, "强势多头排列，均线发散上行", 90)
+        else:
+            result.trend_status, result.ma_alignment, result.trend_strength = (
+                TrendStatus.BULL, "多头排列 MA5>MA10>MA20", 75)
+    elif ma5 > ma10 and ma10 <= ma20:
+        result.trend_status, result.ma_alignment, result.trend_strength = (
+            TrendStatus.WEAK_BULL, "弱势多头，MA5>MA10 但 MA10≤MA20", 55)
+    elif ma5 < ma10 < ma20:
+        prev_spread = (prev['MA20'] - prev['MA5']) / prev['MA5'] * 100 if prev['MA5'] > 0 else 0
+        curr_spread = (ma20 - ma5) / ma5 * 100 if ma5 > 0 else 0
+        if curr_spread > prev_spread and curr_spread > 5:
+            result.trend_status, result.ma_alignment, result.trend_strength = (
+                TrendStatus.STRONG_BEAR, "强势空头排列，均线发散下行", 10)
+        else:
+            result.trend_status, result.ma_alignment, result.trend_strength = (
+                TrendStatus.BEAR, "空头排列 MA5<MA10<MA20", 25)
+    elif ma5 < ma10 and ma10 >= ma20:
+        result.trend_status, result.ma_alignment, result.trend_strength = (
+            TrendStatus.WEAK_BEAR, "弱势空头，MA5<MA10 但 MA10≥MA20", 40)
+    else:
+        result.trend_status, result.ma_alignment, result.trend_strength = (
+            TrendStatus.CONSOLIDATION, "均线缠绕，趋势不明", 50)
+
+    analyzer._calculate_bias(result)
+
+    # 量能分析
+    vol_5d_avg = df['volume'].iloc[-6:-1].mean()
+    if vol_5d_avg > 0:
+        result.volume_ratio_5d = float(latest['volume']) / vol_5d_avg
+    price_change = (latest['close'] - df.iloc[-2]['close']) / df.iloc[-2]['close'] * 100
+    if result.volume_ratio_5d >= analyzer.VOLUME_HEAVY_RATIO:
+        result.volume_status, result.volume_trend = (
+            (VolumeStatus.HEAVY_VOLUME_UP, "放量上涨，多头力量强劲") if price_change > 0
+            else (VolumeStatus.HEAVY_VOLUME_DOWN, "放量下跌，注意风险"))
+    elif result.volume_ratio_5d <= analyzer.VOLUME_SHRINK_RATIO:
+        result.volume_status, result.volume_trend = (
+            (VolumeStatus.SHRINK_VOLUME_UP, "缩量上涨，上攻动能不足") if price_change > 0
+            else (VolumeStatus.SHRINK_VOLUME_DOWN, "缩量回调，洗盘特征明显（好）"))
+    else:
+        result.volume_status, result.volume_trend = VolumeStatus.NORMAL, "量能正常"
+
+    # 支撑压力
+    price = result.current_price
+    if result.ma5 > 0 and abs(price - result.ma5) / result.ma5 <= analyzer.MA_SUPPORT_TOLERANCE \
+            and price >= result.ma5:
+        result.support_ma5 = True
+        result.support_levels.append(result.ma5)
+    if result.ma10 > 0 and abs(price - result.ma10) / result.ma10 <= analyzer.MA_SUPPORT_TOLERANCE \
+            and price >= result.ma10:
+        result.support_ma10 = True
+        if result.ma10 not in result.support_levels:
+            result.support_levels.append(result.ma10)
+    if result.ma20 > 0 and price >= result.ma20:
+        result.support_levels.append(result.ma20)
+    recent_high = df['high'].iloc[-20:].max()
+    if recent_high > price:
+        result.resistance_levels.append(recent_high)
+
+    analyzer._generate_signal(result)
+    return result
+
+
+def _random_bars(rng: np.random.Generator, n: int) -> pd.DataFrame:
+    close = 10 * np.cumprod(1 + rng.normal(0.002, 0.03, n))
+    volume = rng.uniform(5e5, 5e6, n)
+    # 偶发缺失的成交量（不含当日），两种实现都应跳过
+    if n > 10 and rng.random() < 0.3:
+        volume[rng.integers(n - 6, n - 1)] = np.nan
+    return pd.DataFrame({
+        'date': pd.date_range('2024-01-01', periods=n).date,
+        'close': close,
+        'high': close * (1 + rng.uniform(0, 0.03, n)),
+        'volume': volume,
+    })
+
+
+def _assert_same(actual: dict, expected: dict) -> None:
+    assert actual.keys() == expected.keys()
+    for key, value in expected.items():
+        if isinstance(value, float) or (isinstance(value, list) and value and isinstance(value[0], float)):
+            assert actual[key] == pytest.approx(value, rel=1e-9), key
+        else:
+            assert actual[key] == value, key
+
+
+def test_analyze_arrays_matches_pandas_reference():
+    rng = np.random.default_rng(20240101)
+    analyzer = StockTrendAnalyzer()
+    for _ in range(300):
+        df = _random_bars(rng, int(rng.integers(20, 90)))
+        expected = _pandas_reference(analyzer, df, 'TEST')
+        actual = analyzer.analyze_arrays(
+            df['close'].to_numpy(np.float64), df['high'].to_numpy(np.float64),
+            df['volume'].to_numpy(np.float64), 'TEST',
+        )
+        _assert_same(actual.to_dict(), expected.to_dict())
+
+
+def test_analyze_dataframe_delegates_to_arrays():
+    df = _random_bars(np.random.default_rng(7), 60)
+    analyzer = StockTrendAnalyzer()
+    # DataFrame 入口先按日期排序
+    shuffled = df.sample(frac=1, random_state=0)
+    _assert_same(analyzer.analyze(shuffled, 'TEST').to_dict(),
+                 _pandas_reference(analyzer, df, 'TEST').to_dict())
+
+
+def test_analyze_arrays_insufficient_data():
+    result = StockTrendAnalyzer().analyze_arrays(np.ones(10), np.ones(10), np.ones(10), 'TEST')
+    assert result.ma20 == 0
+    assert "数据不足，无法完成分析" in result.risk_factors
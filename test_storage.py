@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+A股自选股智能分析系统 - 存储层单元测试
+===================================
+
+使用方法：
+    pytest test_storage.py
+"""
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from storage import DatabaseManager
+
+
+@pytest.fixture
+def db(tmp_path):
+    # 每个用例使用独立的临时 SQLite 文件，结束后重置单例
+    DatabaseManager.reset_instance()
+    instance = DatabaseManager(f"sqlite:///{tmp_path / 'stock.db'}")
+    yield instance
+    DatabaseManager.reset_instance()
+
+
+def _daily(dates, closes):
+    return pd.DataFrame({
+        'date': dates,
+        'open': closes,
+        'high': [c + 1 for c in closes],
+        'low': [c - 1 for c in closes],
+        'close': closes,
+        'volume': [1000.0] * len(closes),
+    })
+
+
+def test_save_insert_then_update(db):
+    # 日期为字符串
+    assert db.save_daily_data(_daily(['2024-01-02', '2024-01-03'], [10.0, 11.0]), '600519', 'Test') == 2
+
+    # 已有日期（Timestamp）更新，新日期（date）插入；只统计新增条数
+    df = _daily([pd.Timestamp('2024-01-03'), date(2024, 1, 4)], [12.0, 13.0])
+    assert db.save_daily_data(df, '600519', 'Test') == 1
+
+    rows = db.get_latest_data('600519', days=10)
+    assert [row.date for row in rows] == [date(2024, 1, 4), date(2024, 1, 3), date(2024, 1, 2)]
+    assert [row.close for row in rows] == [13.0, 12.0, 10.0]
+
+
+def test_save_dedupes_dates_within_frame(db):
+    # 同一批数据中重复的日期只保留最后一条
+    df = _daily(['2024-01-02', pd.Timestamp('2024-01-02')], [10.0, 10.5])
+    assert db.save_daily_data(df, '600519', 'Test') == 1
+    assert db.get_latest_data('600519', days=10)[0].close == 10.5
+
+
+def test_save_bulk_multiple_codes(db):
+    items = [
+        ('600519', _daily(['2024-01-02', '2024-01-03', '2024-01-04'], [10.0, 11.0, 12.0]), 'Test'),
+        ('000001', _daily(['2024-01-03', '2024-01-04'], [5.0, 6.0]), 'Test'),
+        ('000002', pd.DataFrame(), 'Test'),  # 空数据跳过
+    ]
+    assert db.save_daily_data_bulk(items) == 5
+
+    contexts = db.get_analysis_context_bulk(['600519', '000001', '000002'], history_days=3)
+    assert set(contexts) == {'600519', '000001'}
+
+    context = contexts['600519']
+    assert context['date'] == '2024-01-04'
+    assert context['today']['close'] == 12.0
+    assert context['yesterday']['close'] == 11.0
+    # 历史行情按日期升序，均为 float64 数组
+    history = context['history']
+    assert history['close'].dtype == np.float64
+    np.testing.assert_array_equal(history['close'], [10.0, 11.0, 12.0])
+    np.testing.assert_array_equal(contexts['000001']['history']['close'], [5.0, 6.0])
+
+
+def test_analysis_context_bulk_without_history(db):
+    db.save_daily_data(_daily(['2024-01-02', '2024-01-03'], [10.0, 11.0]), '600519', 'Test')
+    context = db.get_analysis_context_bulk(['600519'])['600519']
+    assert 'history' not in context
+    assert context['price_change_ratio'] == 10.0